@@ -1,8 +1,16 @@
 import os
-from flask import jsonify, send_file
+from datetime import datetime, timezone
+from flask import Response, jsonify, request
+from werkzeug.exceptions import HTTPException, RequestedRangeNotSatisfiable
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
 
 from services.asr import ASRService
 from utils.sse import SSEHelper
+from utils.stat_cache import StatCache
+
+# 音频文件发送缓冲区大小
+SEND_BUFFER_SIZE = 256 * 1024
 
 
 class ASRHandlers:
@@ -40,7 +48,7 @@ class ASRHandlers:
             }), 200
 
         except Exception as e:
-            self.logger.error(f"❌ Listen接口错误: {str(e)}")
+            self.logger.error("❌ Listen接口错误: %s", e)
             return jsonify({"error": str(e), "status": "error"}), 500
 
     def handle_clear_sse(self):
@@ -49,38 +57,76 @@ class ASRHandlers:
             SSEHelper.clear_sse_queue(self.asr_service.sse_queue, self.logger)
             return jsonify({"message": "SSE队列已清空", "status": "success"}), 200
         except Exception as e:
-            self.logger.error(f"❌ 清空SSE队列错误: {str(e)}")
+            self.logger.error("❌ 清空SSE队列错误: %s", e)
             return jsonify({"error": str(e), "status": "error"}), 500
 
-    def handle_send_audio(self, audio_path="tmp.mp3"):
+    def handle_send_audio(self, audio_path=None):
         """发送音频文件"""
+        audio_path = audio_path or self.asr_service.config.audio_output_path
         try:
-            if not os.path.exists(audio_path):
-                self.logger.error(f"音频文件不存在: {audio_path}")
+            try:
+                stat_result = StatCache.stat(audio_path)
+            except FileNotFoundError:
+                self.logger.error("音频文件不存在: %s", audio_path)
                 return jsonify({"error": "音频文件不存在"}), 404
 
-            file_size = os.path.getsize(audio_path)
+            file_size = stat_result.st_size
             if file_size == 0:
-                self.logger.error(f"音频文件为空: {audio_path}")
+                self.logger.error("音频文件为空: %s", audio_path)
                 return jsonify({"error": "音频文件为空"}), 400
 
-            response = send_file(
-                audio_path,
-                mimetype='audio/mpeg',
-                as_attachment=False,
-                download_name='recording.mp3',
-                conditional=True,
-                max_age=0,
-            )
-
-            # 禁用缓存
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-
-            self.logger.info(f"音频流已发送: {audio_path}")
-            return response, 200
-
+            response = Response(mimetype='audio/mpeg', direct_passthrough=True)
+            response.headers['Content-Disposition'] = 'inline; filename=recording.mp3'
+
+            etag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+            response.last_modified = stat_result.st_mtime
+            response.set_etag(etag)
+            response.cache_control.no_cache = True
+
+            # 协商缓存：录音未变化时直接返回304，无需打开文件
+            last_modified = datetime.fromtimestamp(stat_result.st_mtime, timezone.utc)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                return response.make_conditional(request)
+
+            if self.asr_service.config.x_accel_prefix:
+                # 交由nginx直接发送文件
+                response.headers['X-Accel-Redirect'] = (
+                    self.asr_service.config.x_accel_prefix + os.path.basename(audio_path)
+                )
+            else:
+                try:
+                    audio_file = open(audio_path, 'rb')
+                except FileNotFoundError:
+                    StatCache.invalidate(audio_path)
+                    self.logger.error("音频文件不存在: %s", audio_path)
+                    return jsonify({"error": "音频文件不存在"}), 404
+
+                # 缓存的stat只用于304判断；录音可能在此期间被替换，
+                # 长度与ETag以已打开文件的fstat为准，保证与发送内容一致
+                opened_stat = os.fstat(audio_file.fileno())
+                file_size = opened_stat.st_size
+                response.last_modified = opened_stat.st_mtime
+                response.set_etag(f"{opened_stat.st_mtime_ns:x}-{opened_stat.st_size:x}")
+
+                # 通过wsgi.file_wrapper发送，服务器支持时走sendfile零拷贝
+                response.response = wrap_file(request.environ, audio_file, buffer_size=SEND_BUFFER_SIZE)
+                response.content_length = file_size
+
+                # 支持Range请求（206），<audio>拖动进度与Safari/iOS播放依赖字节范围
+                try:
+                    response.make_conditional(request, accept_ranges=True, complete_length=file_size)
+                except RequestedRangeNotSatisfiable:
+                    audio_file.close()
+                    raise
+                if response.status_code == 304:
+                    audio_file.close()
+                    return response
+
+            self.logger.info("音频流已发送: %s", audio_path)
+            return response
+
+        except HTTPException:
+            raise
         except Exception as e:
-            self.logger.error(f"发送音频失败: {str(e)}")
+            self.logger.error("发送音频失败: %s", e)
             return jsonify({"error": f"发送音频失败: {str(e)}"}), 500
@@ -5,6 +5,7 @@ from api.tts_api import TTSHandlers
 from services.asr import ASRService
 from services.tts import TTSService
 from utils.cors import CORSManager
+from utils.json_codec import JSONCodec
 from utils.logger import get_logger
 from utils.sse import SSEHelper
 
@@ -20,8 +21,13 @@ class VoiceServiceRouter:
         self.logger = logger or get_logger("router")
 
         # 初始化处理器
-        self.asr_handlers = ASRHandlers(asr_service, logger) if asr_service else None
-        self.tts_handlers = TTSHandlers(tts_service, logger) if tts_service else None
+        self.asr_handlers = ASRHandlers(asr_service, self.logger) if asr_service else None
+        self.tts_handlers = TTSHandlers(tts_service, self.logger) if tts_service else None
+
+        # 预先序列化静态API信息
+        self._api_info_response = (
+            self._build_api_info(), 200, {'Content-Type': 'application/json'}
+        )
 
         # 设置CORS
         CORSManager.setup_cors(app)
@@ -30,83 +36,84 @@ class VoiceServiceRouter:
         self._register_routes()
 
     def _register_routes(self):
-        """注册所有路由"""
+        """注册所有路由（直接绑定处理器方法，避免额外的闭包转发）"""
+        add_url_rule = self.app.add_url_rule
 
         # ASR路由
         if self.asr_handlers:
-            @self.app.route('/asr/status', methods=['GET'])
-            def asr_status():
-                return self.asr_handlers.handle_status()
+            add_url_rule('/asr/status', 'asr_status',
+                         self.asr_handlers.handle_status, methods=['GET'])
+            add_url_rule('/asr/listen', 'asr_listen',
+                         self.asr_handlers.handle_listen, methods=['POST'])
+            add_url_rule('/asr/stream', 'asr_stream',
+                         self.asr_stream, methods=['GET'])
+            add_url_rule('/asr/clear-sse', 'asr_clear_sse',
+                         self.asr_handlers.handle_clear_sse, methods=['POST'])
+            add_url_rule('/asr/audio', 'asr_audio',
+                         self.asr_handlers.handle_send_audio, methods=['GET'])
 
-            @self.app.route('/asr/listen', methods=['POST'])
-            def asr_listen():
-                return self.asr_handlers.handle_listen()
+        # TTS路由
+        if self.tts_handlers:
+            add_url_rule('/tts/create', 'tts_create',
+                         self.tts_handlers.handle_create, methods=['POST', 'OPTIONS'])
+            add_url_rule('/tts/status', 'tts_status',
+                         self.tts_handlers.handle_status, methods=['GET', 'OPTIONS'])
 
-            @self.app.route('/asr/stream', methods=['GET'])
-            def asr_stream():
-                return Response(
-                    SSEHelper.generate_sse_events(self.asr_service, self.logger),
-                    mimetype='text/event-stream'
-                )
+        # 通用路由
+        add_url_rule('/health', 'health', self.health, methods=['GET'])
+        add_url_rule('/api-info', 'api_info', self.api_info, methods=['GET'])
 
-            @self.app.route('/asr/clear-sse', methods=['POST'])
-            def asr_clear_sse():
-                return self.asr_handlers.handle_clear_sse()
+    def asr_stream(self):
+        """实时SSE流"""
+        return Response(
+            SSEHelper.generate_sse_events(self.asr_service, self.logger),
+            mimetype='text/event-stream',
+            # 禁止反向代理缓冲与缓存，事件到达即转发
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
-            @self.app.route('/asr/audio', methods=['GET'])
-            def asr_audio():
-                return self.asr_handlers.handle_send_audio()
+    def health(self):
+        """服务健康检查"""
+        status = {"status": "healthy", "services": {}}
 
-        # TTS路由
-        if self.tts_handlers:
-            @self.app.route('/tts/create', methods=['POST', 'OPTIONS'])
-            def tts_create():
-                return self.tts_handlers.handle_create()
-
-            @self.app.route('/tts/status', methods=['GET', 'OPTIONS'])
-            def tts_status():
-                return self.tts_handlers.handle_status()
-
-        # 健康检查路由
-        @self.app.route('/health', methods=['GET'])
-        def health():
-            status = {"status": "healthy", "services": {}}
-
-            if self.asr_service:
-                status["services"]["asr"] = self.asr_service.get_status()
-
-            if self.tts_service:
-                status["services"]["tts"] = self.tts_service.get_status()
-
-            return jsonify(status), 200
-
-        @self.app.route('/api-info', methods=['GET'])
-        def api_info():
-            """API信息"""
-            endpoints = []
-
-            if self.asr_handlers:
-                endpoints.extend([
-                    {"path": "/asr/status", "method": "GET", "description": "ASR服务状态"},
-                    {"path": "/asr/listen", "method": "POST", "description": "启动Listen模式"},
-                    {"path": "/asr/stream", "method": "GET", "description": "实时SSE流"},
-                    {"path": "/asr/clear-sse", "method": "POST", "description": "清空SSE队列"},
-                    {"path": "/asr/audio", "method": "GET", "description": "获取音频文件"},
-                ])
-
-            if self.tts_handlers:
-                endpoints.extend([
-                    {"path": "/tts/create", "method": "POST", "description": "生成语音"},
-                    {"path": "/tts/status", "method": "GET", "description": "TTS服务状态"},
-                ])
+        if self.asr_service:
+            status["services"]["asr"] = self.asr_service.get_status()
+
+        if self.tts_service:
+            status["services"]["tts"] = self.tts_service.get_status()
+
+        return jsonify(status), 200
+
+    def _build_api_info(self) -> bytes:
+        """构建API信息（静态内容，启动时序列化一次）"""
+        endpoints = []
 
+        if self.asr_handlers:
             endpoints.extend([
-                {"path": "/health", "method": "GET", "description": "服务健康检查"},
-                {"path": "/api-info", "method": "GET", "description": "API信息"},
+                {"path": "/asr/status", "method": "GET", "description": "ASR服务状态"},
+                {"path": "/asr/listen", "method": "POST", "description": "启动Listen模式"},
+                {"path": "/asr/stream", "method": "GET", "description": "实时SSE流"},
+                {"path": "/asr/clear-sse", "method": "POST", "description": "清空SSE队列"},
+                {"path": "/asr/audio", "method": "GET", "description": "获取音频文件"},
             ])
 
-            return jsonify({
-                "service": "AI Voice Service",
-                "version": "1.0.0",
-                "endpoints": endpoints
-            }), 200
\ No newline at end of file
+        if self.tts_handlers:
+            endpoints.extend([
+                {"path": "/tts/create", "method": "POST", "description": "生成语音"},
+                {"path": "/tts/status", "method": "GET", "description": "TTS服务状态"},
+            ])
+
+        endpoints.extend([
+            {"path": "/health", "method": "GET", "description": "服务健康检查"},
+            {"path": "/api-info", "method": "GET", "description": "API信息"},
+        ])
+
+        return JSONCodec.dumps_bytes({
+            "service": "AI Voice Service",
+            "version": "1.0.0",
+            "endpoints": endpoints
+        })
+
+    def api_info(self):
+        """API信息"""
+        return self._api_info_response
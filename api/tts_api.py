@@ -1,11 +1,30 @@
-import json
-import uuid
+import logging
 import time
 from datetime import datetime
-from flask import request, jsonify, send_file
-from itertools import zip_longest
+from flask import Response, request, jsonify, stream_with_context
+from secrets import token_hex
+from werkzeug.exceptions import HTTPException
 
-from services.tts import TTSService
+from services.tts import TTSBusyError, TTSService
+from utils.json_codec import JSONCodec
+
+# CORS预检响应：无响应体，CORS头由全局after_request添加
+OPTIONS_RESPONSE = ('', 204)
+
+# 按秒缓存的ISO时间戳 (秒, 格式化字符串)
+_ts_cache = (0, "")
+
+
+def _iso_timestamp() -> str:
+    """生成ISO格式时间戳，秒级部分每秒只格式化一次"""
+    global _ts_cache
+    now = time.time()
+    sec = int(now)
+    cached_sec, cached_str = _ts_cache
+    if sec != cached_sec:
+        cached_str = datetime.fromtimestamp(sec).isoformat()
+        _ts_cache = (sec, cached_str)
+    return f"{cached_str}.{int((now - sec) * 1_000_000):06d}"
 
 
 class TTSHandlers:
@@ -18,9 +37,9 @@ class TTSHandlers:
     def handle_create(self):
         """处理TTS创建请求"""
         if request.method == 'OPTIONS':
-            return jsonify({'status': 'ok'}), 200
+            return OPTIONS_RESPONSE
 
-        request_id = str(uuid.uuid4())[:8]
+        request_id = token_hex(4)
         start_time = time.time()
 
         if not self.tts_service.is_running:
@@ -41,17 +60,21 @@ class TTSHandlers:
             # 处理参考音频
             ref_audio_files = request.files.getlist('ref_audio')
             ref_texts = request.form.getlist('ref_text')
-            refs_data = [
-                {
-                    "audio_data": file.read(),
-                    "text": text or ""
-                }
-                for file, text in zip_longest(ref_audio_files, ref_texts)
-                if file and file.filename
-            ]
+            refs_data = []
+            if ref_audio_files:
+                text_count = len(ref_texts)
+                for idx, file in enumerate(ref_audio_files):
+                    if not file.filename:
+                        continue
+                    # 上传已缓冲在内存中，一次read即为一次内存拷贝
+                    audio_data = file.stream.read()
+                    if not audio_data:
+                        continue
+                    ref_text = ref_texts[idx] if idx < text_count else ""
+                    refs_data.append({"audio_data": audio_data, "text": ref_text or ""})
 
             # 生成语音
-            audio_stream, processing_time, audio_size_kb = self.tts_service.generate_speech(
+            audio_chunks, processing_time = self.tts_service.generate_speech_iter(
                 text, refs_data, request_id
             )
 
@@ -61,17 +84,34 @@ class TTSHandlers:
                 "reference_count": len(refs_data)
             })
 
-            return send_file(
-                audio_stream,
+            return Response(
+                stream_with_context(audio_chunks),
+                status=200,
                 mimetype='audio/mpeg',
-                as_attachment=False,
-                download_name='tts_output.mp3',
-                conditional=True
-            ), 200
+                headers={
+                    'Content-Disposition': 'inline; filename=tts_output.mp3',
+                    'Cache-Control': 'no-store',
+                    'X-Accel-Buffering': 'no',
+                }
+            )
+
+        except TTSBusyError as e:
+            self._log_access('/tts/create', 'POST', 429, time.time() - start_time, {
+                "error": str(e)
+            })
+
+            return jsonify({
+                "error": str(e),
+                "request_id": request_id
+            }), 429
+
+        except HTTPException:
+            # 如上传超过MAX_CONTENT_LENGTH时的413，交由Flask返回原状态码
+            raise
 
         except Exception as e:
             error_msg = f"处理失败: {str(e)}"
-            self.logger.error(f"TTS创建失败 (request_id: {request_id}): {error_msg}")
+            self.logger.error("TTS创建失败 (request_id: %s): %s", request_id, error_msg)
 
             self._log_access('/tts/create', 'POST', 500, time.time() - start_time, {
                 "error": error_msg
@@ -85,17 +125,22 @@ class TTSHandlers:
     def handle_status(self):
         """处理TTS状态请求"""
         if request.method == 'OPTIONS':
-            return jsonify({'status': 'ok'}), 200
+            return OPTIONS_RESPONSE
 
         status_info = self.tts_service.get_status()
-        self._log_access('/tts/status', 'GET', 200, 0)
+        # 状态轮询默认不记录访问日志
+        if self.tts_service.config.log_status_access:
+            self._log_access('/tts/status', 'GET', 200, 0)
 
         return jsonify(status_info), 200
 
     def _log_access(self, endpoint, method, status_code, processing_time, data=None):
         """记录访问日志"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_timestamp(),
             'endpoint': endpoint,
             'method': method,
             'status_code': status_code,
@@ -107,4 +152,4 @@ class TTSHandlers:
         if data:
             log_entry['data'] = data
 
-        self.logger.info(json.dumps(log_entry, ensure_ascii=False))
+        self.logger.info(JSONCodec.dumps(log_entry))
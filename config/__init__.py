@@ -1,10 +1,31 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Optional, Any
 from pathlib import Path
 import os
 
 
-@dataclass
+@lru_cache(maxsize=32)
+def resolve_path(path: str) -> Path:
+    """转换为规范化的绝对路径（按路径字符串缓存，不逐级stat解析符号链接）"""
+    return Path(os.path.abspath(path))
+
+
+# 本进程内已确认存在的目录
+_ensured_dirs = set()
+
+
+def ensure_dir(path: Path) -> Path:
+    """目录不存在时才创建，同一目录只检查一次"""
+    if path in _ensured_dirs:
+        return path
+    if not path.is_dir():
+        path.mkdir(parents=True, exist_ok=True)
+    _ensured_dirs.add(path)
+    return path
+
+
+@dataclass(slots=True)
 class BaseConfig:
     """基础配置类"""
     # 服务配置
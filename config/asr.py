@@ -1,12 +1,20 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 from pathlib import Path
-from config import BaseConfig
+from config import BaseConfig, ensure_dir, resolve_path
 
 
-@dataclass
+@dataclass(slots=True)
 class ASRConfig(BaseConfig):
     """ASR服务配置"""
+    # 支持SIGHUP热更新的字段（不涉及模型与音频设备）
+    HOT_RELOAD_FIELDS = (
+        "start_keyword", "stop_keyword",
+        "silence_threshold", "silence_timeout_seconds",
+        "min_output_interval", "sse_coalesce_ms", "sse_coalesce_max", "sse_heartbeat_seconds",
+        "listen_batch_chunks",
+    )
+
     # 服务标识
     service_name: str = "asr"
 
@@ -25,27 +33,40 @@ class ASRConfig(BaseConfig):
     chunk_size: List[int] = field(default_factory=lambda: [0, 10, 5])
     encoder_chunk_look_back: int = 4
     decoder_chunk_look_back: int = 1
+    # listen模式下每次送入模型的分块数（>1时减少调用次数，实时结果延迟相应增加）
+    listen_batch_chunks: int = 1
+
+    # 识别线程绑定的CPU核心（仅Linux有效）
+    asr_cpu_affinity: Optional[List[int]] = None
 
     # 静音检测
     silence_threshold: float = 0.007
     silence_timeout_seconds: float = 5.0
 
+    # 采集队列上限（识别线程卡顿时丢弃新数据而不是无限堆积）
+    audio_queue_maxsize: int = 64
+
     # SSE配置
     sse_queue_maxsize: int = 100
     min_output_interval: float = 0.1
+    sse_coalesce_ms: int = 50
+    sse_coalesce_max: int = 8
+    sse_heartbeat_seconds: float = 15.0
 
     # 音频输出
     audio_output_path: str = "tmp.mp3"
+    # 设置后通过X-Accel-Redirect交由nginx发送录音（nginx internal location前缀）
+    x_accel_prefix: Optional[str] = None
 
     def __post_init__(self):
         """后初始化处理"""
-        super().__post_init__()
+        # slots数据类会重建类对象，super需显式传参
+        super(ASRConfig, self).__post_init__()
 
         # 设置默认模型目录（如果未提供）
         if self.model_path is None:
-            self.model_path = (Path(__file__).parent.parent / "asr_model").resolve()
-        else:
-            self.model_path = Path(self.model_path).resolve()
+            self.model_path = Path(__file__).parent.parent / "asr_model"
+        self.model_path = resolve_path(str(self.model_path))
 
         # 确保模型目录存在
-        self.model_path.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.model_path)
@@ -2,12 +2,20 @@ import os
 from dataclasses import dataclass, field
 from typing import Optional
 from pathlib import Path
-from config import BaseConfig
+from config import BaseConfig, ensure_dir, resolve_path
 
 
-@dataclass
+def _default_model_path() -> Path:
+    """默认TTS模型目录（resolve_path已缓存解析结果）"""
+    return resolve_path(str(Path(__file__).parent.parent / "tts_model"))
+
+
+@dataclass(slots=True)
 class TTSConfig(BaseConfig):
     """TTS服务配置"""
+    # 支持SIGHUP热更新的字段（不涉及模型加载）
+    HOT_RELOAD_FIELDS = ("bitrate", "stream_chunk_size", "tts_timeout", "log_status_access")
+
     # 服务标识
     service_name: str = "tts"
 
@@ -15,24 +23,44 @@ class TTSConfig(BaseConfig):
     model_path: Optional[Path] = None  # 直接使用 Path 类型注解
     device: str = "cuda"
     compile_model: bool = True
+    # 推理精度：auto / fp32 / bf16 / fp16
+    precision: str = "auto"
+    # 解码器线性层int8仅权重量化（需安装torchao，仅CUDA生效）
+    int8_decoder: bool = False
+    # 编译缓存目录，进程重启时复用已编译的内核（默认位于模型目录下）
+    compile_cache_dir: Optional[Path] = None
     decoder_ckpt_path: Optional[Path] = None
     llama_ckpt_file: Optional[Path] = None
 
+    # 推理并发配置
+    tts_concurrency: int = 1
+    tts_timeout: Optional[float] = 300.0
+
     # 音频配置
     output_format: str = "mp3"
     bitrate: str = "192k"
+    stream_chunk_size: int = 64 * 1024
+
+    # 日志配置
+    log_status_access: bool = False
 
     def __post_init__(self):
         """后初始化处理"""
-        super().__post_init__()
+        # slots数据类会重建类对象，super需显式传参
+        super(TTSConfig, self).__post_init__()
 
         # 设置默认模型目录（如果未提供）
         if self.model_path is None:
-            self.model_path = (Path(__file__).parent.parent / "tts_model").resolve()
+            self.model_path = _default_model_path()
+        else:
+            self.model_path = resolve_path(str(self.model_path))
 
         # 确保模型目录存在
-        self.model_path.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.model_path)
 
         # 设置模型文件路径
         self.decoder_ckpt_path = self.model_path / "codec.pth"
         self.llama_ckpt_file = self.model_path / "model.pth"
+
+        if self.compile_cache_dir is None:
+            self.compile_cache_dir = self.model_path / ".compile_cache"
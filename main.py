@@ -1,6 +1,9 @@
+import dataclasses
+import json
 import signal
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from flask import Flask
 from waitress import serve
@@ -9,94 +12,222 @@ from config.asr import ASRConfig
 from config.tts import TTSConfig
 from services.asr import ASRService
 from services.tts import TTSService
+from utils.access_log import AccessLogManager
 from utils.logger import LoggerManager
 from utils.cli import parse_args
+from utils.json_codec import ORJSONProvider
+from utils.upload import MAX_CONTENT_LENGTH, SpooledRequest
+
+# 启动日志中的固定文本，模块加载时构建一次
+_BANNER = "=" * 60
+_STARTUP_MSG = "\n".join([_BANNER, "🚀 AI语音服务启动", _BANNER])
+_ASR_ROUTES_MSG = "\n".join([
+    "\n🎤 ASR接口:",
+    "   GET  /asr/status      - ASR服务状态",
+    "   POST /asr/listen      - 启动Listen模式",
+    "   GET  /asr/stream      - 实时SSE流",
+    "   GET  /asr/audio       - 获取录音文件",
+])
+_TTS_ROUTES_MSG = "\n".join([
+    "\n🎙️ TTS接口:",
+    "   POST /tts/create      - 生成语音",
+    "   GET  /tts/status      - TTS服务状态",
+])
+_COMMON_ROUTES_MSG = "\n".join([
+    "\n🔧 通用接口:",
+    "   GET  /health         - 服务健康检查",
+    "   GET  /api-info       - API信息",
+    _BANNER,
+])
 
 
 class VoiceService:
     """语音服务管理器"""
 
-    def __init__(self, args):
+    def __init__(self, args, handle_signals: bool = True):
         self.args = args
         self.asr_service = None
         self.tts_service = None
         self.app = None
+        self.access_log = None
         self.loggers = None
         self.stopping = False
         self.shutdown_event = threading.Event()
+        self.services_lock = threading.Lock()
+        self._stop_lock = threading.Lock()
 
-        # 设置信号处理
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        # 设置信号处理（由gunicorn等外部服务器托管时交给服务器处理）
+        if handle_signals:
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
+            # 仅在指定配置文件时接管SIGHUP，否则保留终端挂断即退出的默认行为
+            if args.config_file and hasattr(signal, 'SIGHUP'):
+                signal.signal(signal.SIGHUP, self.reload_handler)
 
     def signal_handler(self, signum, frame):
         """信号处理函数，用于触发优雅关闭"""
         if self.loggers and self.loggers.get('main'):
-            self.loggers['main'].info(f"接收到信号 {signum}，准备关闭服务...")
+            self.loggers['main'].info("接收到信号 %s，准备关闭服务...", signum)
         else:
             print(f"接收到信号 {signum}，准备关闭服务...")
 
         self.shutdown_event.set()
 
+    def reload_handler(self, signum, frame):
+        """SIGHUP处理函数：在后台线程中热更新配置，不重新加载模型"""
+        threading.Thread(target=self.reload_config, daemon=True, name="Config_Reload").start()
+
+    def reload_config(self):
+        """从配置文件重新读取可热更新的字段并替换服务配置"""
+        main_logger = self.loggers['main'] if self.loggers else None
+        if main_logger is None:
+            return
+        if not self.args.config_file:
+            main_logger.warning("⚠️ 未指定 --config-file，忽略配置热更新")
+            return
+
+        try:
+            with open(self.args.config_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            main_logger.error("❌ 读取配置文件失败: %s", e)
+            return
+
+        with self.services_lock:
+            # 先校验全部字段，任一类型不符则整体放弃本次热更新
+            updates = []
+            for name, service in (("asr", self.asr_service), ("tts", self.tts_service)):
+                if service is None or not isinstance(data.get(name), dict):
+                    continue
+                allowed = service.config.HOT_RELOAD_FIELDS
+                changes = {}
+                for key, value in data[name].items():
+                    if key not in allowed:
+                        continue
+                    current = getattr(service.config, key)
+                    coerced = self._coerce_config_value(current, value)
+                    if coerced is None:
+                        main_logger.error("❌ %s配置字段 %s 取值无效（类型需为%s，数值需为正数）: %r，已放弃本次热更新",
+                                          name.upper(), key, type(current).__name__, value)
+                        return
+                    changes[key] = coerced
+                ignored = sorted(set(data[name]) - set(changes))
+                if ignored:
+                    main_logger.warning("⚠️ %s配置中以下字段不支持热更新，已忽略: %s", name.upper(), ignored)
+                if changes:
+                    updates.append((name, service, changes))
+
+            for name, service, changes in updates:
+                service.apply_config(dataclasses.replace(service.config, **changes))
+                main_logger.info("🔄 %s配置已热更新: %s", name.upper(), changes)
+
+    @staticmethod
+    def _coerce_config_value(current, value):
+        """按当前字段值的类型校验新值，允许int转float；数值须为正数，不符时返回None"""
+        if current is None:
+            return value
+        # bool是int的子类，需单独判断
+        if isinstance(current, bool) or isinstance(value, bool):
+            return value if isinstance(current, bool) and isinstance(value, bool) else None
+        if isinstance(current, float) and isinstance(value, int):
+            value = float(value)
+        if not isinstance(value, type(current)):
+            return None
+        # 数值字段（阈值、超时、间隔、分块大小等）为0或负数时会使服务失效
+        if isinstance(value, (int, float)) and value <= 0:
+            return None
+        return value
+
     def initialize_services(self):
         """初始化服务"""
         self.loggers = LoggerManager.get_logger("voice_service", self.args.log_level)
         main_logger = self.loggers['main']
 
-        main_logger.info("=" * 60)
-        main_logger.info("🚀 AI语音服务启动")
-        main_logger.info("=" * 60)
+        main_logger.info(_STARTUP_MSG)
 
-        # 初始化ASR服务
+        # ASR与TTS模型加载互不依赖，并行启动以缩短冷启动时间
+        init_tasks = []
         if self.args.enable_asr:
-            try:
-                main_logger.info("🔍 初始化ASR服务...")
-                asr_config = ASRConfig(
-                    host=self.args.host,
-                    port=self.args.port,
-                    start_keyword=self.args.start_keyword,
-                    stop_keyword=self.args.stop_keyword,
-                    silence_threshold=self.args.silence_threshold,
-                    silence_timeout_seconds=self.args.silence_timeout,
-                    log_level=self.args.log_level
-                )
-                self.asr_service = ASRService(asr_config, main_logger)
-            except Exception as e:
-                main_logger.error(f"❌ ASR服务初始化失败: {e}", exc_info=True)
-                if not self.args.ignore_errors:
-                    raise
-
-        # 初始化TTS服务
+            init_tasks.append(self._init_asr_service)
         if self.args.enable_tts:
-            try:
-                main_logger.info("🔍 初始化TTS服务...")
-                tts_config = TTSConfig(
-                    host=self.args.host,
-                    port=self.args.port,
-                    model_path=self.args.tts_model_path,
-                    device=self.args.device,
-                    compile_model=self.args.compile,
-                    log_level=self.args.log_level
-                )
-                self.tts_service = TTSService(tts_config, main_logger)
-                self.tts_service.start()
-                main_logger.info("✅ TTS服务初始化成功")
-                # 初始化引擎编译
-                if self.args.compile:
-                    self.tts_service.init_engine_compile()
-            except Exception as e:
-                main_logger.error(f"❌ TTS服务初始化失败: {e}", exc_info=True)
-                if not self.args.ignore_errors:
-                    raise
+            init_tasks.append(self._init_tts_service)
 
-        # 在TTS之后启动ASR
-        if self.asr_service:
-            self.asr_service.start()
+        with ThreadPoolExecutor(max_workers=len(init_tasks), thread_name_prefix="Service_Init") as executor:
+            futures = [executor.submit(task, main_logger) for task in init_tasks]
+            for future in as_completed(futures):
+                future.result()
+
+    def _init_asr_service(self, main_logger):
+        """初始化并启动ASR服务"""
+        try:
+            main_logger.info("🔍 初始化ASR服务...")
+            asr_config = ASRConfig(
+                host=self.args.host,
+                port=self.args.port,
+                start_keyword=self.args.start_keyword,
+                stop_keyword=self.args.stop_keyword,
+                silence_threshold=self.args.silence_threshold,
+                silence_timeout_seconds=self.args.silence_timeout,
+                asr_cpu_affinity=self.args.asr_cpu_affinity,
+                listen_batch_chunks=self.args.listen_batch_chunks,
+                x_accel_prefix=self.args.x_accel_prefix,
+                log_level=self.args.log_level
+            )
+            asr_service = ASRService(asr_config, main_logger)
+            with self.services_lock:
+                self.asr_service = asr_service
+            asr_service.start()
             main_logger.info("✅ ASR服务初始化成功")
+        except Exception as e:
+            main_logger.error("❌ ASR服务初始化失败: %s", e, exc_info=True)
+            if not self.args.ignore_errors:
+                raise
+
+    def _init_tts_service(self, main_logger):
+        """初始化并启动TTS服务（含编译预热）"""
+        try:
+            main_logger.info("🔍 初始化TTS服务...")
+            tts_config = TTSConfig(
+                host=self.args.host,
+                port=self.args.port,
+                model_path=self.args.tts_model_path,
+                device=self.args.device,
+                compile_model=self.args.compile,
+                tts_concurrency=self.args.tts_concurrency,
+                int8_decoder=self.args.int8_decoder,
+                precision=self.args.precision,
+                log_level=self.args.log_level
+            )
+            tts_service = TTSService(tts_config, main_logger)
+            with self.services_lock:
+                self.tts_service = tts_service
+            tts_service.start()
+            # 初始化引擎编译（预热完成后才算就绪）
+            if self.args.compile:
+                main_logger.info("🔥 开始编译预热...")
+                tts_service.init_engine_compile()
+            main_logger.info("✅ TTS服务初始化成功")
+        except Exception as e:
+            main_logger.error("❌ TTS服务初始化失败: %s", e, exc_info=True)
+            if not self.args.ignore_errors:
+                raise
 
     def create_flask_app(self):
         """创建Flask应用"""
         self.app = Flask(__name__)
+        self.app.request_class = SpooledRequest
+        self.app.config.update(
+            MAX_CONTENT_LENGTH=MAX_CONTENT_LENGTH,
+            PROPAGATE_EXCEPTIONS=True,
+            SEND_FILE_MAX_AGE_DEFAULT=0,
+        )
+        self.app.json = ORJSONProvider(self.app)
+        self.app.json.sort_keys = False
+        self.app.url_map.strict_slashes = False
+
+        # 批量访问日志
+        self.access_log = AccessLogManager(self.loggers['access'])
+        self.access_log.setup_access_log(self.app)
         # 注册路由
         VoiceServiceRouter(
             self.app,
@@ -107,26 +238,19 @@ class VoiceService:
         return self.app
 
     def print_startup_info(self):
-        """打印启动信息"""
-        main_logger = self.loggers['main']
-        main_logger.info("\n📡 服务信息:")
-        main_logger.info(f"   访问地址: http://{self.args.host}:{self.args.port}")
-        main_logger.info(f"   ASR服务: {'启用' if self.args.enable_asr else '禁用'}")
-        main_logger.info(f"   TTS服务: {'启用' if self.args.enable_tts else '禁用'}")
+        """打印启动信息（合并为一条日志记录）"""
+        lines = [
+            "\n📡 服务信息:",
+            f"   访问地址: http://{self.args.host}:{self.args.port}",
+            f"   ASR服务: {'启用' if self.args.enable_asr else '禁用'}",
+            f"   TTS服务: {'启用' if self.args.enable_tts else '禁用'}",
+        ]
         if self.args.enable_asr:
-            main_logger.info("\n🎤 ASR接口:")
-            main_logger.info("   GET  /asr/status      - ASR服务状态")
-            main_logger.info("   POST /asr/listen      - 启动Listen模式")
-            main_logger.info("   GET  /asr/stream      - 实时SSE流")
-            main_logger.info("   GET  /asr/audio       - 获取录音文件")
+            lines.append(_ASR_ROUTES_MSG)
         if self.args.enable_tts:
-            main_logger.info("\n🎙️ TTS接口:")
-            main_logger.info("   POST /tts/create      - 生成语音")
-            main_logger.info("   GET  /tts/status      - TTS服务状态")
-        main_logger.info("\n🔧 通用接口:")
-        main_logger.info("   GET  /health         - 服务健康检查")
-        main_logger.info("   GET  /api-info       - API信息")
-        main_logger.info("=" * 60)
+            lines.append(_TTS_ROUTES_MSG)
+        lines.append(_COMMON_ROUTES_MSG)
+        self.loggers['main'].info("\n".join(lines))
 
     def run(self):
         """初始化并运行服务，等待关闭信号"""
@@ -136,19 +260,28 @@ class VoiceService:
             self.print_startup_info()
         except Exception as e:
             if self.loggers and self.loggers.get('main'):
-                self.loggers['main'].error(f"❌ 服务初始化失败: {e}", exc_info=True)
+                self.loggers['main'].error("❌ 服务初始化失败: %s", e, exc_info=True)
             else:
                 print(f"❌ 服务初始化失败: {e}")
             self.stop()
             sys.exit(1)
 
         main_logger = self.loggers['main']
-        main_logger.info(f"🌐 服务已经启动，监听 {self.args.host}:{self.args.port}...")
+        main_logger.info("🌐 服务已经启动，监听 %s:%s...", self.args.host, self.args.port)
 
         server_thread = threading.Thread(
             target=serve,
             args=(app,),
-            kwargs={'host': self.args.host, 'port': self.args.port, 'threads': 8},
+            kwargs={
+                'host': self.args.host,
+                'port': self.args.port,
+                # SSE长连接会长期占用工作线程，需要足够的线程数与连接上限
+                'threads': self.args.threads,
+                'connection_limit': self.args.connection_limit,
+                'backlog': self.args.backlog,
+                'channel_timeout': 120,
+                'asyncore_use_poll': True,
+            },
             daemon=True
         )
         server_thread.start()
@@ -164,7 +297,7 @@ class VoiceService:
 
     def stop(self):
         """停止所有服务"""
-        with threading.Lock():
+        with self._stop_lock:
             if self.stopping:
                 return
             self.stopping = True
@@ -180,7 +313,7 @@ class VoiceService:
                 main_logger.info("✅ ASR服务已停止")
             except Exception as e:
                 if main_logger:
-                    main_logger.error(f"❌ ASR服务停止时发生错误: {e}", exc_info=True)
+                    main_logger.error("❌ ASR服务停止时发生错误: %s", e, exc_info=True)
 
         if self.tts_service:
             try:
@@ -189,11 +322,16 @@ class VoiceService:
                 main_logger.info("✅ TTS服务已停止")
             except Exception as e:
                 if main_logger:
-                    main_logger.error(f"❌ TTS服务停止时发生错误: {e}", exc_info=True)
+                    main_logger.error("❌ TTS服务停止时发生错误: %s", e, exc_info=True)
 
         if main_logger:
             main_logger.info("✅ 所有服务均已停止。")
 
+        # 停止后台日志线程，确保队列中的日志全部写出
+        if self.access_log:
+            self.access_log.flush()
+        LoggerManager.stop_listeners()
+
 
 def main():
     """主函数：解析参数并启动服务"""
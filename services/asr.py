@@ -1,19 +1,26 @@
 import os
-import sys
 import collections
+import contextlib
+import logging
 import threading
 import queue
 import time
 import numpy as np
 from typing import List, Optional, Dict, Any, Tuple
 from funasr import AutoModel
-from pydub import AudioSegment
 
 from config.asr import ASRConfig
 from services.base import BaseService
 from utils.audio import AudioUtils
+from utils.chunk_buffer import ChunkBuffer
+from utils.ringbuf import BroadcastRingBuffer
 from utils.sse import SSEHelper
 
+_BANNER = "=" * 60
+
+# 屏蔽funasr推理时的标准输出，进程内只打开一次
+_DEVNULL = open(os.devnull, 'w')
+
 
 class ASRService(BaseService):
     """ASR语音识别服务"""
@@ -24,17 +31,30 @@ class ASRService(BaseService):
         # 禁用第三方库冗余输出
         os.environ["TQDM_DISABLE"] = "1"
         os.environ["FUNASR_VERBOSE"] = "0"
+        logging.getLogger("funasr").setLevel(logging.ERROR)
 
         # 状态变量初始化
         self.chunk_size_samples = int(config.sample_rate * config.chunk_duration_ms / 1000)
-        self.audio_queue = queue.Queue()
-        self.sse_queue = queue.Queue(maxsize=config.sse_queue_maxsize)
+        # 单生产者单消费者：deque的append/popleft本身是原子的，配合Event唤醒，回调中不再加锁
+        self.audio_queue: collections.deque = collections.deque()
+        self._audio_ready = threading.Event()
+        self.dropped_chunks = 0
+        # 回调使用的预分配缓冲区池，识别线程用完后归还
+        self._chunk_pool = queue.SimpleQueue()
+        for _ in range(8):
+            self._chunk_pool.put(np.empty(self.chunk_size_samples, dtype=np.float32))
+        self.sse_queue = BroadcastRingBuffer(maxsize=config.sse_queue_maxsize)
 
         # 识别状态
         self.recording_active = False
         self.listen_mode = False
         self.text_buffer = collections.deque(maxlen=3)
+        # 关键词缓存（开始, 结束），配置热更新时刷新
+        self._keywords: Tuple[str, str] = (config.start_keyword, config.stop_keyword)
         self.current_text = ""
+        # 实时结果限频：间隔内的更新只保留最新一条，稍后补发
+        self._last_partial_time = 0.0
+        self._pending_partial: Optional[str] = None
         self.final_results: List[str] = []
         self.listen_results: List[str] = []
 
@@ -46,39 +66,74 @@ class ASRService(BaseService):
         # 模型与音频流
         self.model: Optional[AutoModel] = None
         self.model_cache: Dict[str, Any] = {}
+        # 一句识别结束后由识别线程重置流式缓存
+        self._cache_reset_pending = False
         self.audio_stream: Optional[Any] = None
 
-        # 音频收集
-        self.audio_fragments = []
+        # 录音数据（int16 PCM，原地追加）
+        self.audio_fragments = bytearray()
+        self._voice_end_offset = 0
         self.recognition_thread: Optional[threading.Thread] = None
+
+        # 录音编码保存线程，避免识别线程等待ffmpeg
+        self._save_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.save_thread: Optional[threading.Thread] = None
         self.stopping = False
 
+        # 生命周期状态快照，仅在状态变化时更新
+        self._status_snapshot: Dict[str, Any] = {}
+        self._update_status_snapshot()
+
         # 打印配置信息
         self._log_config()
 
+    def apply_config(self, config: ASRConfig) -> None:
+        """热更新配置并刷新关键词缓存"""
+        super().apply_config(config)
+        self._keywords = (config.start_keyword, config.stop_keyword)
+
     def _log_config(self) -> None:
         """打印初始化配置"""
-        self.logger.info("=" * 60)
-        self.logger.info("📋 ASR 服务初始化配置")
-        self.logger.info(f"触发关键词: 开始='{self.config.start_keyword}', 结束='{self.config.stop_keyword}'")
-        self.logger.info(f"静音检测: 阈值={self.config.silence_threshold}, 超时={self.config.silence_timeout_seconds}s")
-        self.logger.info(f"音频配置: {self.config.sample_rate}Hz / {self.config.chunk_duration_ms}ms/块")
-        self.logger.info("=" * 60)
+        self.logger.info("\n".join([
+            _BANNER,
+            "📋 ASR 服务初始化配置",
+            f"触发关键词: 开始='{self.config.start_keyword}', 结束='{self.config.stop_keyword}'",
+            f"静音检测: 阈值={self.config.silence_threshold}, 超时={self.config.silence_timeout_seconds}s",
+            f"音频配置: {self.config.sample_rate}Hz / {self.config.chunk_duration_ms}ms/块",
+            _BANNER,
+        ]))
 
     def _audio_callback(self, indata: np.ndarray, frames, time, status) -> None:
         """音频采集回调"""
         if status:
-            self.logger.warning(f"⚠️ 音频状态异常: {status}")
+            self.logger.warning("⚠️ 音频状态异常: %s", status)
         try:
-            audio_data = indata[:, 0].copy().astype(np.float32)
-            self.audio_queue.put(audio_data)
+            # 实时线程只借用池中的缓冲区，不做内存分配（池空或块变大时才新建）
+            try:
+                buf = self._chunk_pool.get_nowait()
+            except queue.Empty:
+                buf = np.empty(self.chunk_size_samples, dtype=np.float32)
+            if len(buf) < frames:
+                buf = np.empty(frames, dtype=np.float32)
+            np.copyto(buf[:frames], indata[:, 0])
+
+            # 空闲时的静音块不含关键词，直接丢弃
+            if (not self.recording_active and not self.listen_mode
+                    and AudioUtils.is_silent(buf[:frames], self.config.silence_threshold)):
+                self._chunk_pool.put(buf)
+                return
 
-            if self.recording_active:
-                audio_segment = AudioUtils.convert_numpy_to_audio_segment(audio_data)
-                self.audio_fragments.append(audio_segment)
+            if len(self.audio_queue) >= self.config.audio_queue_maxsize:
+                self._chunk_pool.put(buf)
+                self.dropped_chunks += 1
+                return
+            self.audio_queue.append((buf, frames))
+            # 事件已置位时跳过set()，避免获取Event内部的锁
+            if not self._audio_ready.is_set():
+                self._audio_ready.set()
 
         except Exception as e:
-            self.logger.error(f"❌ 音频回调错误: {str(e)}")
+            self.logger.error("❌ 音频回调错误: %s", e)
 
     def _validate_model_path(self, model_path: str) -> bool:
         """验证模型路径有效性"""
@@ -120,6 +175,7 @@ class ASRService(BaseService):
                         disable_update=True
                     )
                     self.logger.info("✅ 模型加载成功")
+                    self._update_status_snapshot()
                     return
                 except Exception as e:
                     self.logger.warning(f"⚠️ 策略{idx + 1}加载失败: {str(e)[:100]}")
@@ -134,120 +190,166 @@ class ASRService(BaseService):
             return ""
 
         try:
-            with open(os.devnull, 'w') as devnull:
-                old_stdout = sys.stdout
-                sys.stdout = devnull
-                try:
-                    res = self.model.generate(
-                        input=audio_chunk,
-                        cache=self.model_cache,
-                        is_final=is_final,
-                        chunk_size=self.config.chunk_size,
-                        encoder_chunk_look_back=self.config.encoder_chunk_look_back,
-                        decoder_chunk_look_back=self.config.decoder_chunk_look_back
-                    )
-                finally:
-                    sys.stdout = old_stdout
+            with contextlib.redirect_stdout(_DEVNULL):
+                res = self.model.generate(
+                    input=audio_chunk,
+                    cache=self.model_cache,
+                    is_final=is_final,
+                    chunk_size=self.config.chunk_size,
+                    encoder_chunk_look_back=self.config.encoder_chunk_look_back,
+                    decoder_chunk_look_back=self.config.decoder_chunk_look_back
+                )
 
             if not res or 'text' not in res[0]:
                 return ""
 
             return res[0]['text'].strip()
         except Exception as e:
-            self.logger.error(f"❌ 音频识别错误: {str(e)}")
+            self.logger.error("❌ 音频识别错误: %s", e)
             return ""
 
     def _recognition_worker(self) -> None:
         """识别工作线程"""
+        self._apply_cpu_affinity()
         if self.model is None:
             self.load_model()
 
-        audio_buffer = np.array([], dtype=np.float32)
+        audio_buffer = ChunkBuffer()
         self.logger.info("🎤 实时语音识别线程已启动")
 
         try:
             while not self.stop_event.is_set():
                 try:
-                    audio_chunk = self.audio_queue.get(timeout=0.5)
-
-                    # 静音超时处理
-                    if self.recording_active:
-                        self._handle_silence_timeout(audio_chunk)
-                        if self.silence_timeout_ended:
-                            self._reset_recognition_state()
-                            audio_buffer = np.array([], dtype=np.float32)
-                            continue
-
-                    # 音频缓冲区处理
-                    audio_buffer = np.concatenate([audio_buffer, audio_chunk])
-                    while len(audio_buffer) >= self.chunk_size_samples:
-                        process_chunk = audio_buffer[:self.chunk_size_samples]
-                        audio_buffer = audio_buffer[self.chunk_size_samples:]
-
-                        # 音频识别
-                        recognized_text = self._process_audio_chunk(process_chunk)
-                        if not recognized_text:
-                            continue
-
-                        # 对于listen模式，直接开始录音而不需要开始关键字
-                        if self.listen_mode and not self.recording_active:
-                            self.recording_active = True
-                            self.last_voice_time = time.time()
-                            self.logger.info("▶️ Listen模式已启动，开始录音")
-                            SSEHelper.send_sse_data(self.sse_queue, 'status', 'recording_started')
-
-                            # 实时结果推送
-                            self.current_text = recognized_text
-                            self._log_realtime_text(recognized_text)
-                            SSEHelper.send_sse_data(self.sse_queue, 'partial', recognized_text)
-                            continue
-
-                        # 关键词检测（仅非listen模式需要）
-                        self.text_buffer.append(recognized_text)
-                        start_detected, stop_detected = self._check_keywords()
-
-                        # 状态控制
-                        self._handle_recognition_state(start_detected, stop_detected, recognized_text)
-
-                        # 实时结果推送
-                        if self.recording_active and recognized_text != self.current_text:
-                            self.current_text = recognized_text
-                            self._log_realtime_text(recognized_text)
-                            SSEHelper.send_sse_data(self.sse_queue, 'partial', recognized_text)
-
-                except queue.Empty:
-                    continue
+                    # 一次唤醒取出队列中积压的全部数据块，卡顿后能尽快追上
+                    for audio_chunk in self._drain_audio_queue(timeout=0.5):
+                        self._handle_audio_chunk(audio_chunk, audio_buffer)
+
                 except Exception as e:
-                    self.logger.error(f"❌ 识别线程异常: {str(e)}")
+                    self.logger.error("❌ 识别线程异常: %s", e)
                     continue
 
         finally:
-            self._process_remaining_audio(audio_buffer)
+            self._process_remaining_audio(audio_buffer.drain())
             SSEHelper.clear_sse_queue(self.sse_queue, self.logger)
+
+    def _drain_audio_queue(self, timeout: float) -> List[np.ndarray]:
+        """等待数据到达后取出全部积压数据块，超时返回空列表
+
+        数据拷贝出来后缓冲区立即归还池中。
+        """
+        if not self.audio_queue:
+            self._audio_ready.wait(timeout)
+        # 先清除事件再取数据，之后到达的数据会重新置位，不会漏唤醒
+        self._audio_ready.clear()
+
+        items = []
+        while True:
+            try:
+                items.append(self.audio_queue.popleft())
+            except IndexError:
+                break
+
+        chunks = []
+        for buf, frames in items:
+            chunks.append(buf[:frames].copy())
+            self._chunk_pool.put(buf)
+        return chunks
+
+    def _handle_audio_chunk(self, audio_chunk: np.ndarray, audio_buffer: ChunkBuffer) -> None:
+        """处理单个采集数据块：录音保存、静音超时与分块识别"""
+        # 上一句已结束：先结束模型流式状态，新的一句从空缓存开始
+        if self._cache_reset_pending:
+            self._end_model_stream(audio_buffer)
+
+        # 补发限频期间暂存的实时结果
+        if self._pending_partial is not None:
+            self._push_partial(self._pending_partial)
+
+        if self.recording_active:
+            # 录音中追加int16 PCM，保存时整段处理；记录最后一个有声块的结束位置
+            silent = self._is_silent(audio_chunk)
+            self.audio_fragments += AudioUtils.float_to_int16(audio_chunk).tobytes()
+            if not silent:
+                self._voice_end_offset = len(self.audio_fragments)
+
+            # 静音超时处理
+            self._handle_silence_timeout(silent)
+            if self.silence_timeout_ended:
+                self._reset_recognition_state()
+                audio_buffer.clear()
+                return
+
+        # 音频缓冲区处理（listen模式可合并多个分块一次识别）
+        window = self.chunk_size_samples
+        if self.listen_mode:
+            window *= max(1, self.config.listen_batch_chunks)
+        audio_buffer.append(audio_chunk)
+        while len(audio_buffer) >= window:
+            process_chunk = audio_buffer.pop(window)
+
+            # 音频识别
+            recognized_text = self._process_audio_chunk(process_chunk)
+            if not recognized_text:
+                continue
+
+            # 对于listen模式，直接开始录音而不需要开始关键字
+            if self.listen_mode and not self.recording_active:
+                self.recording_active = True
+                self.last_voice_time = time.time()
+                self.logger.info("▶️ Listen模式已启动，开始录音")
+                SSEHelper.send_sse_data(self.sse_queue, 'status', 'recording_started')
+
+                # 实时结果推送
+                self.current_text = recognized_text
+                self._log_realtime_text(recognized_text)
+                self._push_partial(recognized_text)
+                continue
+
+            # 关键词检测（仅非listen模式需要）
+            self.text_buffer.append(recognized_text)
+            start_detected, stop_detected = self._check_keywords()
+
+            # 状态控制
+            self._handle_recognition_state(start_detected, stop_detected, recognized_text)
+
+            # 实时结果推送
+            if self.recording_active and recognized_text != self.current_text:
+                self.current_text = recognized_text
+                self._log_realtime_text(recognized_text)
+                self._push_partial(recognized_text)
+
+    def _apply_cpu_affinity(self) -> None:
+        """将识别线程绑定到指定CPU，减少与HTTP线程的争用"""
+        cpus = self.config.asr_cpu_affinity
+        if not cpus:
+            return
+        if not hasattr(os, "sched_setaffinity"):
+            self.logger.warning("⚠️ 当前平台不支持CPU亲和性设置")
+            return
+        try:
+            # pid为0时作用于调用线程
+            os.sched_setaffinity(0, set(cpus))
+            self.logger.info("📌 识别线程已绑定CPU: %s", sorted(cpus))
+        except OSError as e:
+            self.logger.warning("⚠️ 设置CPU亲和性失败: %s", e)
+
     def _is_silent(self, audio_chunk: np.ndarray) -> bool:
         """检测是否为静音"""
         return AudioUtils.is_silent(audio_chunk, self.config.silence_threshold)
 
     def _check_keywords(self) -> Tuple[bool, bool]:
         """检查文本缓冲区中是否包含开始或结束关键词"""
+        start_keyword, stop_keyword = self._keywords
         combined_text = "".join(self.text_buffer)
-        start_detected = self.config.start_keyword in combined_text
-        stop_detected = self.config.stop_keyword in combined_text
+        start_detected = start_keyword in combined_text
+        stop_detected = stop_keyword in combined_text
         return start_detected, stop_detected
 
 
     def _reset_recognition_state(self) -> None:
         """重置识别状态"""
-        # 保存音频
-        if self.audio_fragments:
-            AudioUtils.merge_audio_segments(
-                self.audio_fragments,
-                self.config.audio_output_path,
-                logger=self.logger
-            )
-
-            # 保存后清空音频片段，避免重复处理
-            self.audio_fragments.clear()
+        # 保存音频（交给保存线程，清空缓冲避免重复处理）
+        self._save_recording()
 
         self.recording_active = False
         # 保持listen_mode不变，这样可以在结束转换后自动退出listen模式
@@ -255,7 +357,10 @@ class ASRService(BaseService):
         self.waiting_for_silence = False
         self.silence_timeout_ended = False
         self.current_text = ""
+        self._pending_partial = None
         self.text_buffer.clear()
+        # 可能在HTTP线程中调用，缓存交由识别线程在处理下一块前重置
+        self._cache_reset_pending = True
 
         # 发送结束事件
         if self.final_results:
@@ -264,9 +369,9 @@ class ASRService(BaseService):
             self.final_results.clear()
 
 
-    def _handle_silence_timeout(self, audio_chunk: np.ndarray) -> None:
+    def _handle_silence_timeout(self, silent: bool) -> None:
         """处理静音超时"""
-        if not self._is_silent(audio_chunk):
+        if not silent:
             self.last_voice_time = time.time()
             self.waiting_for_silence = False
         else:
@@ -285,13 +390,13 @@ class ASRService(BaseService):
         if not self.listen_mode and start_detected and not self.recording_active:
             self.recording_active = True
             self.last_voice_time = time.time()
-            self.logger.info(f"▶️ 检测到开始关键词: '{self.config.start_keyword}'，开始录音")
+            self.logger.info("▶️ 检测到开始关键词: '%s'，开始录音", self.config.start_keyword)
             SSEHelper.send_sse_data(self.sse_queue, 'status', 'recording_started')
 
         # listen模式或非listen模式都需要结束关键字来停止录音
         elif stop_detected and self.recording_active:
             self.recording_active = False
-            self.logger.info(f"⏹️ 检测到结束关键词: '{self.config.stop_keyword}'，停止录音")
+            self.logger.info("⏹️ 检测到结束关键词: '%s'，停止录音", self.config.stop_keyword)
 
             # 处理最终结果
             if recognized_text:
@@ -305,19 +410,13 @@ class ASRService(BaseService):
                 SSEHelper.send_sse_data(self.sse_queue, 'final', final_text)
 
                 # 保存音频
-                if self.audio_fragments:
-                    AudioUtils.merge_audio_segments(
-                        self.audio_fragments,
-                        self.config.audio_output_path,
-                        logger=self.logger
-                    )
-                    self.audio_fragments.clear()
+                self._save_recording()
 
             # 重置状态
             self._reset_recognition_state()
 
     def _process_remaining_audio(self, audio_buffer: np.ndarray) -> None:
-        """处理剩余的音频缓冲区"""
+        """处理剩余的音频缓冲区（仅包含尚未送入模型的采样）"""
         if len(audio_buffer) > 0 and self.recording_active:
             # 处理剩余的音频
             final_text = self._process_audio_chunk(audio_buffer, is_final=True)
@@ -327,17 +426,55 @@ class ASRService(BaseService):
                 SSEHelper.send_sse_data(self.sse_queue, 'final', final_result)
 
                 # 保存音频
-                if self.audio_fragments:
-                    AudioUtils.merge_audio_segments(
-                        self.audio_fragments,
-                        self.config.audio_output_path,
-                        logger=self.logger
-                    )
-                    self.audio_fragments.clear()
+                self._save_recording()
+
+    def _end_model_stream(self, audio_buffer: ChunkBuffer) -> None:
+        """以is_final送入剩余采样结束当前流式识别，并清空模型缓存"""
+        self._cache_reset_pending = False
+        if len(audio_buffer):
+            # 剩余采样属于已结束的一句，识别结果不再推送
+            self._process_audio_chunk(audio_buffer.drain(), is_final=True)
+        self.model_cache.clear()
+
+    def _push_partial(self, text: str) -> None:
+        """推送实时识别结果，间隔小于min_output_interval时暂存最新结果"""
+        now = time.monotonic()
+        if now - self._last_partial_time < self.config.min_output_interval:
+            self._pending_partial = text
+            return
+        self._last_partial_time = now
+        self._pending_partial = None
+        SSEHelper.send_sse_data(self.sse_queue, 'partial', text)
+
+    def _save_recording(self) -> None:
+        """将当前录音交给保存线程编码并清空缓冲
+
+        末尾只用于触发静音超时的静音块不保存（整段都是静音时保留原样）。
+        """
+        if not self.audio_fragments:
+            return
+        end = self._voice_end_offset or len(self.audio_fragments)
+        self._save_queue.put(bytes(self.audio_fragments[:end]))
+        self.audio_fragments.clear()
+        self._voice_end_offset = 0
+
+    def _save_worker(self) -> None:
+        """录音保存线程：依次编码队列中的录音，收到None时退出"""
+        while True:
+            pcm_data = self._save_queue.get()
+            if pcm_data is None:
+                break
+            AudioUtils.merge_audio_segments(
+                pcm_data,
+                self.config.audio_output_path,
+                sample_rate=self.config.sample_rate,
+                logger=self.logger
+            )
 
     def _log_realtime_text(self, text: str) -> None:
-        """记录实时识别文本"""
-        self.logger.info(f"🎤 实时识别: {text}")
+        """记录实时识别文本（未启用INFO时跳过格式化）"""
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("🎤 实时识别: %s", text)
 
     def start(self) -> None:
         """启动ASR服务"""
@@ -358,6 +495,14 @@ class ASRService(BaseService):
                 )
                 self.recognition_thread.start()
 
+                # 启动录音保存线程
+                self.save_thread = threading.Thread(
+                    target=self._save_worker,
+                    daemon=True,
+                    name="ASR_Saver"
+                )
+                self.save_thread.start()
+
                 # 启动音频流
                 self.audio_stream = AudioUtils.start_audio_stream(
                     self.config.sample_rate,
@@ -367,6 +512,7 @@ class ASRService(BaseService):
                 )
 
                 self.is_running = True
+                self._update_status_snapshot()
                 self.logger.info("✅ ASR服务启动成功")
 
         except Exception as e:
@@ -398,11 +544,7 @@ class ASRService(BaseService):
                 self.logger.warning(f"⚠️ 关闭音频流时出错: {str(e)}")
 
         # 清空音频队列
-        try:
-            while not self.audio_queue.empty():
-                self.audio_queue.get_nowait()
-        except Exception:
-            pass
+        self.audio_queue.clear()
 
         # 等待识别线程结束
         if self.recognition_thread and self.recognition_thread.is_alive():
@@ -413,19 +555,13 @@ class ASRService(BaseService):
             else:
                 self.logger.info("✅ 识别线程已结束")
 
-        # 异步合并音频片段
+        # 保存未完成的录音，并等待保存线程写完
         if self.audio_fragments:
-            self.logger.info("🎵 异步合并音频片段...")
-            import threading
-            merge_thread = threading.Thread(
-                target=lambda: AudioUtils.merge_audio_segments(
-                    self.audio_fragments,
-                    self.config.audio_output_path,
-                    logger=self.logger
-                )
-            )
-            merge_thread.daemon = True
-            merge_thread.start()
+            self.logger.info("🎵 保存剩余录音...")
+            self._save_recording()
+        if self.save_thread and self.save_thread.is_alive():
+            self._save_queue.put(None)
+            self.save_thread.join(timeout=5.0)
 
         # 释放模型资源
         if self.model:
@@ -442,16 +578,24 @@ class ASRService(BaseService):
 
         # 标记服务为已停止
         self.is_running = False
+        self._update_status_snapshot()
         self.logger.info("✅ ASR服务已完全停止")
 
 
-    def get_status(self) -> Dict[str, Any]:
-        """获取服务状态"""
-        return {
+    def _update_status_snapshot(self) -> None:
+        """更新生命周期状态快照"""
+        self._status_snapshot = {
             "status": "running" if self.is_running else "stopped",
             "service": "asr",
             "model_loaded": self.model is not None,
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取服务状态"""
+        return {
+            **self._status_snapshot,
             "recording_active": self.recording_active,
             "listen_mode": self.listen_mode,
-            "sse_queue_size": self.sse_queue.qsize()
+            "sse_queue_size": self.sse_queue.qsize(),
+            "dropped_audio_chunks": self.dropped_chunks
         }
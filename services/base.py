@@ -30,6 +30,10 @@ class BaseService(ABC):
         """获取服务状态"""
         pass
 
+    def apply_config(self, config) -> None:
+        """热更新配置（整体替换配置对象）"""
+        self.config = config
+
     def cleanup(self) -> None:
         """清理资源"""
         with self.thread_lock:
@@ -1,8 +1,10 @@
+import itertools
 import os
+import subprocess
 import threading
 import time
-from io import BytesIO
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 import numpy as np
 import torch
@@ -10,11 +12,26 @@ from fish_speech.models.dac.inference import load_model as load_decoder_model
 from fish_speech.inference_engine import TTSInferenceEngine
 from fish_speech.models.text2semantic.inference import launch_thread_safe_queue
 from fish_speech.utils.schema import ServeReferenceAudio, ServeTTSRequest
-from pydub import AudioSegment
 
 from config.tts import TTSConfig
 from services.base import BaseService
 
+try:
+    import lameenc
+except ImportError:  # lameenc为可选依赖，缺失时回退到ffmpeg管道编码
+    lameenc = None
+
+
+# 编译预热文本：短句与长句各一次，覆盖常见的输入长度
+WARMUP_TEXTS = (
+    "你好世界",
+    "欢迎使用语音合成服务，这是一段用于预热编译缓存的较长文本，合成完成后即可正常提供服务。",
+)
+
+
+class TTSBusyError(RuntimeError):
+    """推理槽位已满"""
+
 
 class TTSService(BaseService):
     """TTS文本转语音服务"""
@@ -23,10 +40,26 @@ class TTSService(BaseService):
         super().__init__(config, logger)
 
         self.tts_engine = None
-        self.engine_lock = threading.Lock()
+        # 推理并发槽位与工作线程池
+        self.inference_slots = threading.BoundedSemaphore(config.tts_concurrency)
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.tts_concurrency,
+            thread_name_prefix="TTS_Worker"
+        )
         self.initialization_error = None
         self.stopping = False
 
+        # 推理请求模板（固定采样参数只校验一次）
+        self._request_template = ServeTTSRequest(
+            text="",
+            references=[],
+            max_new_tokens=2048,
+            top_p=0.7,
+            temperature=0.7,
+            repetition_penalty=1.0,
+            streaming=False
+        )
+
     def initialize(self) -> None:
         """初始化TTS引擎"""
         with self.thread_lock:
@@ -46,27 +79,42 @@ class TTSService(BaseService):
 
                 # 设备配置
                 device_obj = torch.device(self.config.device)
-                dtype = torch.float16 if self.config.device == "cuda" else torch.float32
+                dtype = self._select_dtype(device_obj, self.config.precision)
+                self.logger.info("🔧 推理精度: %s", dtype)
 
                 if device_obj.type == "cuda":
                     torch.backends.cudnn.benchmark = True
+                    # 允许float32矩阵乘与卷积使用TF32（Ampere及以上GPU生效）
+                    torch.backends.cuda.matmul.allow_tf32 = True
+                    torch.backends.cudnn.allow_tf32 = True
                     torch.cuda.empty_cache()
 
-                # 加载模型
-                self.logger.info("🔍 加载LLaMA模型...")
-                llama_queue = launch_thread_safe_queue(
-                    checkpoint_path=self.config.model_path,
-                    device=device_obj,
-                    precision=dtype,
-                    compile=self.config.compile_model,
-                )
-
-                self.logger.info("🔍 加载解码器模型...")
-                decoder_model = load_decoder_model(
-                    config_name="modded_dac_vq",
-                    checkpoint_path=self.config.decoder_ckpt_path,
-                    device=device_obj,
-                )
+                # 持久化编译缓存，第二次启动时跳过大部分重新编译
+                if self.config.compile_model:
+                    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(self.config.compile_cache_dir))
+                    os.environ.setdefault("TRITON_CACHE_DIR", str(self.config.compile_cache_dir / "triton"))
+                    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+                # 加载模型：LLaMA与解码器权重互不依赖，并行加载以重叠磁盘读取与显存拷贝
+                self.logger.info("🔍 并行加载LLaMA与解码器模型...")
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="TTS_Loader") as loader:
+                    llama_future = loader.submit(
+                        launch_thread_safe_queue,
+                        checkpoint_path=self.config.model_path,
+                        device=device_obj,
+                        precision=dtype,
+                        compile=self.config.compile_model,
+                    )
+                    decoder_future = loader.submit(
+                        load_decoder_model,
+                        config_name="modded_dac_vq",
+                        checkpoint_path=self.config.decoder_ckpt_path,
+                        device=device_obj,
+                    )
+                    llama_queue = llama_future.result()
+                    decoder_model = decoder_future.result()
+                if self.config.int8_decoder:
+                    self._quantize_decoder(decoder_model, device_obj)
 
                 self.logger.info("🔍 初始化TTS推理引擎...")
                 self.tts_engine = TTSInferenceEngine(
@@ -84,6 +132,38 @@ class TTSService(BaseService):
                 self.logger.error(f"❌ TTS引擎初始化失败: {self.initialization_error}")
                 raise
 
+    def _quantize_decoder(self, decoder_model, device_obj: torch.device) -> None:
+        """对解码器线性层做int8仅权重量化（卷积层保持原精度）"""
+        if device_obj.type != "cuda":
+            self.logger.warning("⚠️ int8解码器量化仅支持CUDA，已跳过")
+            return
+        try:
+            from torchao.quantization import int8_weight_only, quantize_
+        except ImportError:
+            self.logger.warning("⚠️ 未安装torchao，跳过int8解码器量化")
+            return
+        quantize_(decoder_model, int8_weight_only())
+        self.logger.info("✅ 解码器已启用int8权重量化")
+
+    @staticmethod
+    def _select_dtype(device_obj: torch.device, precision: str = "auto") -> torch.dtype:
+        """选择推理精度
+
+        auto时Ampere及以上GPU使用bfloat16（不易溢出），其余GPU使用float16，CPU使用float32；
+        显式指定时按指定精度（CPU上的半精度请求回退到float32）。
+        """
+        if precision == "fp32":
+            return torch.float32
+        if device_obj.type != "cuda":
+            return torch.float32
+        if precision == "bf16":
+            return torch.bfloat16
+        if precision == "fp16":
+            return torch.float16
+        if torch.cuda.is_available() and torch.cuda.get_device_capability(device_obj)[0] >= 8:
+            return torch.bfloat16
+        return torch.float16
+
     def _inference(self, text: str, references: List[ServeReferenceAudio] = None, request_id: Optional[str] = None) -> tuple:
         """核心推理逻辑（私有方法）"""
         if not self.is_running:
@@ -91,29 +171,27 @@ class TTSService(BaseService):
 
         references = references or []
 
-        # 构建请求
-        req = ServeTTSRequest(
-            text=text,
-            references=references,
-            max_new_tokens=2048,
-            top_p=0.7,
-            temperature=0.7,
-            repetition_penalty=1.0,
-            streaming=False
-        )
+        # 基于模板构建请求，固定参数不再重复校验
+        req = self._request_template.model_copy(update={"text": text, "references": references})
+
+        # 获取推理槽位，已满时直接拒绝而不是无限排队
+        if not self.inference_slots.acquire(blocking=False):
+            raise TTSBusyError("TTS服务繁忙，请稍后重试")
 
         # 推理生成音频
         self.logger.info(f"🎙️ 开始合成文本: {text[:50]}...")
         start_time = time.time()
-        audio_segments = []
 
         try:
-            with self.engine_lock:
-                for result in self.tts_engine.inference(req):
-                    if result.code == "error":
-                        raise Exception(result.error)
-                    if result.audio and result.audio[1] is not None:
-                        audio_segments.append(result.audio[1])
+            future = self.executor.submit(self._run_engine, req)
+        except Exception:
+            self.inference_slots.release()
+            raise
+        # 推理真正结束后才释放槽位（超时的推理仍占用GPU）
+        future.add_done_callback(lambda _: self.inference_slots.release())
+
+        try:
+            audio_segments = future.result(timeout=self.config.tts_timeout)
         except Exception as e:
             self.logger.error(f"❌ TTS推理失败: {str(e)}")
             raise
@@ -123,52 +201,129 @@ class TTSService(BaseService):
 
         # 音频处理
         audio_data = np.concatenate(audio_segments, axis=0, dtype=np.float32)
-        max_val = np.max(np.abs(audio_data))
+        # 峰值取max与-min的较大者，避免np.abs生成整段临时数组
+        max_val = max(float(audio_data.max()), -float(audio_data.min()))
         if max_val > 1e-6:
-            audio_data /= max_val
+            audio_data *= 1.0 / max_val
 
         processing_time = time.time() - start_time
         return audio_data, processing_time
 
-    def generate_speech(self, text: str, refs: list = None, request_id: str = None) -> tuple:
-        """生成语音"""
-        # 处理参考音频
-        references = []
-        if refs:
-            references = [
-                ServeReferenceAudio(audio=ref["audio_data"], text=ref.get("text", ""))
-                for ref in refs if ref.get("audio_data")
-            ]
-
-        # 调用核心推理方法
-        audio_data, processing_time = self._inference(text, references, request_id)
-
-        # 音频数据转换为int16
-        audio_data_int16 = (audio_data * 32767).astype(np.int16)
-
-        audio_stream = BytesIO()
-
-        audio_segment = AudioSegment(
-            data=audio_data_int16.tobytes(),
-            sample_width=audio_data_int16.dtype.itemsize,
-            frame_rate=self.tts_engine.decoder_model.sample_rate,
-            channels=1
-        )
-
-        audio_segment.export(
-            audio_stream,
-            format="mp3",
-            bitrate=self.config.bitrate
+    def _run_engine(self, req: ServeTTSRequest) -> list:
+        """在工作线程中执行推理"""
+        audio_segments = []
+        # 工作线程中不记录梯度图
+        with torch.inference_mode():
+            for result in self.tts_engine.inference(req):
+                if result.code == "error":
+                    raise Exception(result.error)
+                if result.audio and result.audio[1] is not None:
+                    audio_segments.append(result.audio[1])
+        return audio_segments
+
+    @staticmethod
+    def _build_references(refs: list = None) -> List[ServeReferenceAudio]:
+        """将参考音频数据转换为推理请求格式"""
+        if not refs:
+            return []
+        return [
+            ServeReferenceAudio(audio=ref["audio_data"], text=ref.get("text", ""))
+            for ref in refs if ref.get("audio_data")
+        ]
+
+    def generate_speech_iter(self, text: str, refs: list = None,
+                             request_id: str = None) -> Tuple[Iterator[bytes], float]:
+        """生成语音，返回MP3分块迭代器（边编码边输出）"""
+        # 推理在返回前完成，保证错误能以HTTP错误码返回
+        audio_data, processing_time = self._inference(text, self._build_references(refs), request_id)
+        self.logger.info("✅ 合成完成 | 耗时: %.2fs | 开始流式编码", processing_time)
+        chunks = self._iter_mp3(audio_data)
+        # 预取第一块：编码器启动失败或参数错误在发送响应头之前抛出，仍能返回500
+        first = next(chunks, b"")
+        return itertools.chain((first,), chunks), processing_time
+
+    def _iter_mp3(self, audio_data: np.ndarray) -> Iterator[bytes]:
+        """将PCM编码为MP3并分块输出（优先进程内lameenc，否则ffmpeg管道）"""
+        # 缩放结果直接写入int16数组，省去浮点临时数组
+        pcm_int16 = np.empty(audio_data.shape, dtype=np.int16)
+        np.multiply(audio_data, 32767.0, out=pcm_int16, casting='unsafe')
+
+        if lameenc is not None:
+            return self._iter_mp3_lame(pcm_int16)
+        return self._iter_mp3_ffmpeg(pcm_int16)
+
+    def _iter_mp3_lame(self, pcm_int16: np.ndarray) -> Iterator[bytes]:
+        """使用lameenc在进程内编码，无需启动子进程"""
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(int(self.config.bitrate.rstrip("kK")))
+        encoder.set_in_sample_rate(self.tts_engine.decoder_model.sample_rate)
+        encoder.set_channels(1)
+        encoder.set_quality(2)
+
+        # 按块编码，边编码边输出
+        step = max(1, self.config.stream_chunk_size // pcm_int16.itemsize)
+        for start in range(0, len(pcm_int16), step):
+            data = encoder.encode(pcm_int16[start:start + step].tobytes())
+            if data:
+                yield bytes(data)
+        tail = encoder.flush()
+        if tail:
+            yield bytes(tail)
+
+    def _iter_mp3_ffmpeg(self, pcm_int16: np.ndarray) -> Iterator[bytes]:
+        """通过ffmpeg管道将PCM编码为MP3并分块输出"""
+        # 以内存视图交给管道，避免再拷贝一份bytes
+        pcm = memoryview(pcm_int16).cast('B')
+        process = subprocess.Popen(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "s16le",
+                "-ar", str(self.tts_engine.decoder_model.sample_rate),
+                "-ac", "1",
+                "-i", "pipe:0",
+                "-f", "mp3",
+                "-b:a", self.config.bitrate,
+                "pipe:1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
         )
 
-        # 重置流指针到开始位置
-        audio_stream.seek(0)
-
-        audio_size_kb = len(audio_stream.getvalue()) / 1024
-
-        self.logger.info(f"✅ 合成完成 | 耗时: {processing_time:.2f}s | 大小: {audio_size_kb:.1f}KB")
+        def feed():
+            try:
+                process.stdin.write(pcm)
+            except (BrokenPipeError, ValueError):
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        # 单独线程写入，避免stdin/stdout管道互相阻塞
+        writer = threading.Thread(target=feed, daemon=True, name="TTS_Encoder")
+        writer.start()
 
-        return audio_stream, processing_time, audio_size_kb
+        try:
+            while True:
+                chunk = process.stdout.read1(self.config.stream_chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            # 输出结束后等待进程退出以获取退出码
+            returncode = process.wait()
+        finally:
+            # 客户端提前断开时终止编码进程
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+            writer.join(timeout=1.0)
+
+        if returncode != 0:
+            self.logger.error("❌ ffmpeg编码失败，退出码: %s", returncode)
+            raise RuntimeError(f"ffmpeg编码失败，退出码: {returncode}")
 
     def start(self) -> None:
         """启动TTS服务"""
@@ -181,6 +336,9 @@ class TTSService(BaseService):
                 return
             self.stopping = True
 
+        # 停止推理线程池
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
         # 释放资源
         if self.tts_engine:
             try:
@@ -207,7 +365,9 @@ class TTSService(BaseService):
 
     def init_engine_compile(self):
         """初始化引擎编译（预热）"""
-        audio_data, processing_time = self._inference("你好世界")
+        for text in WARMUP_TEXTS:
+            audio_data, processing_time = self._inference(text)
 
-        audio_size_kb = len(audio_data) / 1024
-        self.logger.info(f"✅ 首次编译 | 耗时: {processing_time:.2f}s | 大小: {audio_size_kb:.1f}KB")
+            audio_size_kb = len(audio_data) / 1024
+            self.logger.info("✅ 预热编译 | 文本长度: %d | 耗时: %.2fs | 大小: %.1fKB",
+                             len(text), processing_time, audio_size_kb)
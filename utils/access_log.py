@@ -0,0 +1,58 @@
+import collections
+import threading
+import time
+
+from flask import Flask, g, request
+
+
+class AccessLogManager:
+    """访问日志管理器：请求路径只入队，后台线程批量写出"""
+
+    # 负载均衡高频探测的路径，不记录访问日志
+    SILENT_PATHS = ('/health', '/api-info')
+
+    def __init__(self, logger, flush_interval: float = 1.0, batch_size: int = 100, maxlen: int = 1024):
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.entries = collections.deque(maxlen=maxlen)
+        self.wakeup = threading.Event()
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True, name="Access_Log")
+        self.flush_thread.start()
+
+    def setup_access_log(self, app: Flask) -> None:
+        """注册请求计时与访问记录钩子"""
+
+        @app.before_request
+        def before_request():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def after_request(response):
+            if request.path in self.SILENT_PATHS:
+                return response
+            start = g.get('request_start')
+            elapsed_ms = (time.perf_counter() - start) * 1000 if start else 0.0
+            self.entries.append((request.method, request.path, response.status_code, elapsed_ms))
+            if len(self.entries) >= self.batch_size:
+                self.wakeup.set()
+            return response
+
+    def _flush_loop(self) -> None:
+        """按时间间隔或条数批量写出访问日志"""
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """写出当前缓冲的访问记录"""
+        lines = []
+        while self.entries:
+            try:
+                method, path, status, elapsed_ms = self.entries.popleft()
+            except IndexError:
+                break
+            lines.append(f"{method} {path} {status} {elapsed_ms:.1f}ms")
+        if lines:
+            self.logger.info("\n".join(lines))
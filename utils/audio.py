@@ -1,8 +1,21 @@
 import numpy as np
 import sounddevice as sd
-from pydub import AudioSegment
-from typing import Optional, Callable
+from typing import Any, Dict, Optional, Callable
 import os
+import subprocess
+
+try:
+    import soundfile as sf
+except ImportError:  # soundfile为可选依赖，缺失时所有格式均走ffmpeg管道编码
+    sf = None
+
+from utils.stat_cache import StatCache
+
+# 可由libsndfile在进程内直接写出的格式
+_SNDFILE_FORMATS = ('wav', 'flac', 'ogg')
+
+# 已选定的输入设备索引，避免重复查询PortAudio
+_DEVICE_CACHE: Dict[str, Any] = {}
 
 
 class AudioUtils:
@@ -19,14 +32,17 @@ class AudioUtils:
             raise RuntimeError("未找到可用的音频输入设备")
 
         for i, dev in input_devices:
-            logger.info(f"   {i}: {dev['name']} (通道数: {dev['max_input_channels']})")
+            logger.info("   %s: %s (通道数: %s)", i, dev['name'], dev['max_input_channels'])
 
         default_id = sd.default.device[0]
         if default_id not in [i for i, _ in input_devices]:
-            logger.warning(f"默认设备{default_id}不可用，切换到第一个可用设备")
-            sd.default.device = input_devices[0][0]
+            logger.warning("默认设备%s不可用，切换到第一个可用设备", default_id)
+            default_id = input_devices[0][0]
+            sd.default.device = default_id
 
-        logger.info(f"使用音频设备: {sd.query_devices(sd.default.device[0])['name']}")
+        # 复用已查询的设备列表，不再单独查询选中设备
+        _DEVICE_CACHE['index'] = default_id
+        logger.info("使用音频设备: %s", devices[default_id]['name'])
 
     @staticmethod
     def start_audio_stream(sample_rate: int, chunk_duration_ms: int, callback: Callable, logger):
@@ -35,107 +51,172 @@ class AudioUtils:
             audio_stream = sd.InputStream(
                 samplerate=sample_rate,
                 channels=1,
+                # 与回调缓冲区同为float32，拷贝时无需类型转换
+                dtype='float32',
                 callback=callback,
                 blocksize=int(sample_rate * chunk_duration_ms / 1000),
-                device=sd.default.device[0]
+                device=_DEVICE_CACHE.get('index', sd.default.device[0])
             )
             audio_stream.start()
             logger.info("音频流已启动")
             return audio_stream
         except Exception as e:
-            logger.error(f"音频流启动失败: {str(e)}")
+            logger.error("音频流启动失败: %s", e)
             raise
 
     @staticmethod
     def is_silent(audio_chunk: np.ndarray, silence_threshold: float) -> bool:
-        """检测是否为静音"""
-        energy = np.sqrt(np.mean(audio_chunk ** 2))
-        return energy < silence_threshold
+        """检测是否为静音
+
+        比较平方能量和与阈值平方×采样数，等价于RMS < 阈值，
+        但只需一次点积，不产生临时数组也不开方。
+        """
+        energy_sq = float(np.dot(audio_chunk, audio_chunk))
+        return energy_sq < silence_threshold * silence_threshold * len(audio_chunk)
+
+    @staticmethod
+    def float_to_int16(audio_data: np.ndarray) -> np.ndarray:
+        """将float32（-1~1）转换为int16，超出范围的采样先截断，避免溢出回绕"""
+        clipped = np.clip(audio_data, -1.0, 1.0)
+        audio_int16 = np.empty(clipped.shape, dtype=np.int16)
+        # 乘法结果直接写入int16缓冲区，省去一次float临时数组
+        np.multiply(clipped, 32767.0, out=audio_int16, casting='unsafe')
+        return audio_int16
 
     @staticmethod
-    def convert_numpy_to_audio_segment(
-            audio_data: np.ndarray,
-            sample_rate: int = 16000,
-            channels: int = 1,
-            sample_width: int = 2
-    ) -> AudioSegment:
-        """将numpy数组转换为AudioSegment"""
+    def dbfs(samples: np.ndarray) -> float:
+        """计算int16幅度采样（float数组）的dBFS，与pydub的定义一致"""
+        if not samples.size:
+            return float("-inf")
+        rms = np.sqrt(float(np.dot(samples, samples)) / samples.size)
+        if rms == 0:
+            return float("-inf")
+        return 20 * np.log10(rms / 32768)
+
+    @staticmethod
+    def db_to_ratio(db: float) -> float:
+        """分贝转换为幅度倍数"""
+        return 10 ** (db / 20)
+
+    @staticmethod
+    def encode_pcm(
+            pcm_data: bytes,
+            output_path: str,
+            sample_rate: int,
+            audio_format: str = "mp3",
+            bitrate: str = "192k"
+    ) -> None:
+        """通过ffmpeg管道将单声道int16 PCM直接编码为文件
+
+        不经过pydub导出，省去中间WAV缓冲；先写临时文件再替换，
+        避免下载接口读到写了一半的文件。
+        wav/flac/ogg在安装了soundfile时由libsndfile进程内写出，无需启动ffmpeg。
+        """
+        tmp_path = output_path + ".tmp"
+        if sf is not None and audio_format.lower() in _SNDFILE_FORMATS:
+            try:
+                # 临时文件扩展名无法推断格式，需显式指定
+                sf.write(tmp_path, np.frombuffer(pcm_data, dtype=np.int16), sample_rate,
+                         format=audio_format.upper())
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            os.replace(tmp_path, output_path)
+            return
+
         try:
-            # 将float32（-1~1）转换为int16（-32768~32767）
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            audio_bytes = audio_int16.tobytes()
-
-            audio_segment = AudioSegment(
-                data=audio_bytes,
-                sample_width=sample_width,
-                frame_rate=sample_rate,
-                channels=channels
+            subprocess.run(
+                [
+                    "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                    "-f", "s16le",
+                    "-ar", str(sample_rate),
+                    "-ac", "1",
+                    "-i", "pipe:0",
+                    "-f", audio_format,
+                    "-b:a", bitrate,
+                    "-q:a", "0",
+                    tmp_path,
+                ],
+                input=pcm_data,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=True,
             )
-            return audio_segment
-        except Exception as e:
-            raise ValueError(f"音频格式转换失败: {str(e)}")
+        except subprocess.CalledProcessError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(f"ffmpeg编码失败: {e.stderr.decode(errors='replace').strip()}") from e
+        os.replace(tmp_path, output_path)
 
     @staticmethod
     def merge_audio_segments(
-            segments: list,
+            pcm_data: bytes,
             output_path: str,
             target_dBFS: float = -16.0,
-            logger=None
+            logger=None,
+            sample_rate: int = 16000
     ) -> bool:
-        """合并音频片段并优化音量"""
-        if not segments:
+        """将录音数据（单声道int16 PCM）优化音量后导出"""
+        if not pcm_data:
             if logger:
                 logger.warning("⚠️ 无音频片段可合并")
             return False
 
         try:
-            # 合并所有音频片段
-            merged_audio = AudioSegment.empty()
-            for segment in segments:
-                merged_audio += segment
+            samples = np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32)
 
-            # 音量优化
-            original_dBFS = merged_audio.dBFS
+            # 音量优化：先在标量上确定总增益，最后对整段音频只缩放一次
+            original_dBFS = AudioUtils.dbfs(samples)
+            gain_db = 0.0
             if original_dBFS < -40:
                 volume_gain_db = 25
                 if logger:
-                    logger.info(f"📈 检测到极低音量，应用大幅增益: +{volume_gain_db}dB")
-                merged_audio = merged_audio + volume_gain_db
+                    logger.info("📈 检测到极低音量，应用大幅增益: +%ddB", volume_gain_db)
+                gain_db += volume_gain_db
 
             # 标准化到目标音量
-            current_dBFS = merged_audio.dBFS
+            current_dBFS = original_dBFS + gain_db
             if current_dBFS < target_dBFS:
                 needed_gain = target_dBFS - current_dBFS
-                if needed_gain > 0:
-                    if logger:
-                        logger.info(f"🎯 应用标准化增益: +{needed_gain:.1f}dB")
-                    merged_audio = merged_audio + min(needed_gain, 15)
+                if logger:
+                    logger.info("🎯 应用标准化增益: +%.1fdB", needed_gain)
+                gain_db += min(needed_gain, 15)
 
             # 防止削波
-            max_possible = merged_audio.max
-            if max_possible >= 32767:
+            peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+            if peak * AudioUtils.db_to_ratio(gain_db) >= 32767:
                 if logger:
-                    logger.warning(f"⚠️ 检测到削波风险! 当前最大值: {max_possible}")
-                while merged_audio.max >= 32767:
-                    merged_audio = merged_audio - 2
+                    max_possible = min(int(peak * AudioUtils.db_to_ratio(gain_db)), 32767)
+                    logger.warning("⚠️ 检测到削波风险! 当前最大值: %d", max_possible)
+                while peak * AudioUtils.db_to_ratio(gain_db) >= 32767:
+                    gain_db -= 2
+
+            # 增益与截断合并：先按缩放前的边界原地截断，再乘增益直接写入int16，
+            # 与先缩放再截断等价，但只读一遍float数据且不产生临时数组
+            ratio = AudioUtils.db_to_ratio(gain_db)
+            np.clip(samples, -32768.0 / ratio, 32767.0 / ratio, out=samples)
+            output = np.empty(samples.shape, dtype=np.int16)
+            np.multiply(samples, ratio, out=output, casting='unsafe')
 
             # 导出音频
-            merged_audio.export(
+            AudioUtils.encode_pcm(
+                output.tobytes(),
                 output_path,
-                format=os.path.splitext(output_path)[1][1:],  # 从扩展名获取格式
-                bitrate="192k",
-                parameters=["-q:a", "0"]
+                sample_rate=sample_rate,
+                audio_format=os.path.splitext(output_path)[1][1:]  # 从扩展名获取格式
             )
+            StatCache.invalidate(output_path)
 
             if logger:
-                final_duration = len(merged_audio) / 1000
-                final_dBFS = merged_audio.dBFS
-                logger.info(f"✅ 音频已保存: {output_path} (时长: {final_duration:.2f}s)")
-                logger.info(f"🎯 最终音量: {final_dBFS:.1f}dBFS")
+                final_duration = len(output) / sample_rate
+                final_dBFS = AudioUtils.dbfs(output.astype(np.float32))
+                logger.info("✅ 音频已保存: %s (时长: %.2fs)", output_path, final_duration)
+                logger.info("🎯 最终音量: %.1fdBFS", final_dBFS)
 
             return True
 
         except Exception as e:
             if logger:
-                logger.error(f"❌ 音频合并失败: {str(e)}")
+                logger.error("❌ 音频合并失败: %s", e)
             return False
\ No newline at end of file
@@ -0,0 +1,57 @@
+import collections
+
+import numpy as np
+
+
+class ChunkBuffer:
+    """按块累积音频采样的缓冲区
+
+    追加时只保存数据块引用，取出固定长度时才拷贝所需的采样，
+    避免每次追加都重新拼接整个缓冲区。
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+        self._chunks = collections.deque()
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, chunk: np.ndarray) -> None:
+        """追加数据块"""
+        if len(chunk):
+            self._chunks.append(chunk)
+            self._length += len(chunk)
+
+    def pop(self, size: int) -> np.ndarray:
+        """从头部取出size个采样（调用方需保证数据足够）"""
+        # 首个数据块已足够时直接返回切片视图，不拷贝
+        if self._chunks and len(self._chunks[0]) >= size:
+            chunk = self._chunks.popleft()
+            if len(chunk) > size:
+                self._chunks.appendleft(chunk[size:])
+            self._length -= size
+            return chunk[:size]
+
+        out = np.empty(size, dtype=self.dtype)
+        filled = 0
+        while filled < size:
+            chunk = self._chunks.popleft()
+            take = min(size - filled, len(chunk))
+            out[filled:filled + take] = chunk[:take]
+            filled += take
+            if take < len(chunk):
+                # 剩余部分放回头部（切片视图，不拷贝）
+                self._chunks.appendleft(chunk[take:])
+        self._length -= size
+        return out
+
+    def drain(self) -> np.ndarray:
+        """取出全部剩余采样"""
+        return self.pop(self._length)
+
+    def clear(self) -> None:
+        """清空缓冲区"""
+        self._chunks.clear()
+        self._length = 0
@@ -1,7 +1,7 @@
 import argparse
 
 
-def parse_args():
+def parse_args(argv=None):
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='AI语音服务（ASR + TTS）')
 
@@ -14,6 +14,14 @@ def parse_args():
                         help='日志级别')
     parser.add_argument('--ignore-errors', action='store_true',
                         help='忽略服务初始化错误')
+    parser.add_argument('--config-file', type=str,
+                        help='热更新配置文件(JSON)，收到SIGHUP时重新加载')
+    parser.add_argument('--threads', type=int, default=32,
+                        help='HTTP工作线程数')
+    parser.add_argument('--connection-limit', type=int, default=1024,
+                        help='最大并发连接数')
+    parser.add_argument('--backlog', type=int, default=2048,
+                        help='监听队列长度')
 
     # ASR配置
     parser.add_argument('--enable-asr', action='store_true',
@@ -28,6 +36,12 @@ def parse_args():
                         help='静音阈值')
     parser.add_argument('--silence-timeout', type=float, default=5.0,
                         help='静音超时秒数')
+    parser.add_argument('--asr-cpu-affinity', type=int, nargs='+',
+                        help='ASR识别线程绑定的CPU核心编号')
+    parser.add_argument('--listen-batch-chunks', type=int, default=1,
+                        help='listen模式下每次识别合并的分块数')
+    parser.add_argument('--x-accel-prefix', type=str,
+                        help='录音文件的nginx internal location前缀，设置后通过X-Accel-Redirect发送')
 
     # TTS配置
     parser.add_argument('--enable-tts', action='store_true',
@@ -39,5 +53,12 @@ def parse_args():
                         help='运行设备')
     parser.add_argument('--compile', action='store_true',
                         help='启用模型编译优化')
+    parser.add_argument('--precision', type=str, default='auto',
+                        choices=['auto', 'fp32', 'bf16', 'fp16'],
+                        help='TTS推理精度（auto按GPU能力选择）')
+    parser.add_argument('--tts-concurrency', type=int, default=1,
+                        help='TTS并发推理数')
+    parser.add_argument('--int8-decoder', action='store_true',
+                        help='解码器int8权重量化（需安装torchao）')
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
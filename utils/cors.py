@@ -11,13 +11,18 @@ class CORSManager:
         if origins is None:
             origins = ["*"]
 
+        # 头部取值在注册时计算一次，每个响应只做赋值
+        cors_headers = (
+            ('Access-Control-Allow-Origin', ', '.join(origins)),
+            ('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept,X-Requested-With'),
+            ('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS'),
+            ('Access-Control-Expose-Headers', 'Content-Disposition'),
+        )
+
         @app.after_request
         def after_request(response):
             """全局CORS配置"""
-            response.headers.update({
-                'Access-Control-Allow-Origin': ', '.join(origins),
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization,Accept,X-Requested-With',
-                'Access-Control-Allow-Methods': 'GET,PUT,POST,DELETE,OPTIONS',
-                'Access-Control-Expose-Headers': 'Content-Disposition'
-            })
+            headers = response.headers
+            for name, value in cors_headers:
+                headers[name] = value
             return response
\ No newline at end of file
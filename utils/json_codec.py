@@ -0,0 +1,41 @@
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时回退到标准库
+    orjson = None
+
+
+class JSONCodec:
+    """JSON序列化工具（优先使用orjson）"""
+
+    @staticmethod
+    def dumps_bytes(obj: Any) -> bytes:
+        """序列化为UTF-8字节"""
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def dumps(obj: Any) -> str:
+        """序列化为字符串"""
+        if orjson is not None:
+            return orjson.dumps(obj).decode('utf-8')
+        return json.dumps(obj, ensure_ascii=False)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON提供器：安装orjson时使用orjson序列化响应"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -1,25 +1,195 @@
+import atexit
+import gzip
 import logging
 import os
+import queue
+import shutil
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-from typing import Dict, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+
+# 滚动日志压缩线程（单线程保证压缩顺序）
+_compress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Log_Compress")
+
+
+def _gzip_file(source: str, dest: str) -> None:
+    """压缩日志备份并删除原文件"""
+    try:
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.remove(source)
+    except OSError as e:
+        print(f"日志备份压缩失败: {source}: {e}", file=sys.stderr)
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """带写缓冲的滚动文件处理器
+
+    普通日志先写入缓冲区，由后台线程周期性刷盘；ERROR及以上级别立即刷盘。
+    滚动判断使用已写入字节计数，不再每条记录都查询文件大小。
+    滚动出的备份在后台线程中压缩为 .gz，写日志线程不等待压缩。
+    """
+
+    def __init__(self, *args, buffer_size: int = 64 * 1024, compress: bool = True, **kwargs):
+        self.buffer_size = buffer_size
+        super().__init__(*args, **kwargs)
+        try:
+            self._bytes_written = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._bytes_written = 0
+
+        self._compress_future: Optional[Future] = None
+        if compress:
+            self.namer = self._gz_namer
+            self.rotator = self._async_gzip_rotator
+
+    @staticmethod
+    def _gz_namer(name: str) -> str:
+        """备份文件名追加 .gz 后缀"""
+        return name + ".gz"
+
+    def _async_gzip_rotator(self, source: str, dest: str) -> None:
+        """先改名为临时文件，再提交后台压缩"""
+        pending = dest[:-len(".gz")] + ".pending"
+        os.rename(source, pending)
+        self._compress_future = _compress_executor.submit(_gzip_file, pending, dest)
+
+    def _open(self):
+        """以大缓冲区打开日志文件"""
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """根据已写入字节数判断是否需要滚动"""
+        return 0 < self.maxBytes <= self._bytes_written
+
+    def doRollover(self) -> None:
+        """滚动日志文件并重置计数"""
+        # 上一次压缩未完成时先等待，避免备份序号错位
+        if self._compress_future is not None:
+            self._compress_future.result()
+            self._compress_future = None
+        super().doRollover()
+        self._bytes_written = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """写入日志，不对每条记录单独刷盘"""
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode(self.encoding or 'utf-8', errors='replace'))
+            if 0 < self.maxBytes <= self._bytes_written + size:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += size
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """按秒缓存时间字符串的格式化器，同一秒内的记录不再重复strftime"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (-1, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        # 未指定datefmt时默认格式包含毫秒，不能按秒缓存
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_str = self._time_cache
+        if second == cached_second:
+            return cached_str
+        formatted = super().formatTime(record, datefmt)
+        self._time_cache = (second, formatted)
+        return formatted
+
+
+# 需要静默的第三方库日志器
+NOISY_LOGGERS = ("asr_model", "fish_speech", "torch", "werkzeug", "modelscope", "urllib3")
 
 
 class LoggerManager:
     """统一的日志管理器"""
 
     _instances = {}
+    _instances_lock = threading.Lock()
+    _listeners: List[QueueListener] = []
+    _buffered_handlers: List[BufferedRotatingFileHandler] = []
+    _flush_interval = 30.0
+    _flush_stop = threading.Event()
+    _flush_thread: Optional[threading.Thread] = None
 
     @classmethod
     def get_logger(cls, service_name: str = "default", log_level: str = "INFO") -> Dict[str, logging.Logger]:
         """获取日志器实例"""
-        if service_name not in cls._instances:
-            cls._instances[service_name] = cls._setup_logger(service_name, log_level)
-        return cls._instances[service_name]
+        loggers = cls._instances.get(service_name)
+        if loggers is not None:
+            return loggers
+        # 加锁后再检查一次，避免并发首次调用重复创建处理器、泄漏文件句柄
+        with cls._instances_lock:
+            if service_name not in cls._instances:
+                cls._instances[service_name] = cls._setup_logger(service_name, log_level)
+            return cls._instances[service_name]
 
-    @staticmethod
-    def _setup_logger(service_name: str, log_level: str) -> Dict[str, logging.Logger]:
+    @classmethod
+    def _attach_queue(cls, logger: logging.Logger, handlers: List[logging.Handler]) -> QueueHandler:
+        """日志器只负责入队，由后台线程写入实际的处理器"""
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        cls._listeners.append(listener)
+        return queue_handler
+
+    @classmethod
+    def _file_handler(cls, filename: str) -> BufferedRotatingFileHandler:
+        """创建带缓冲的滚动文件处理器并纳入周期刷盘"""
+        handler = BufferedRotatingFileHandler(
+            filename, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
+        )
+        cls._buffered_handlers.append(handler)
+
+        if cls._flush_thread is None:
+            cls._flush_thread = threading.Thread(
+                target=cls._flush_loop, daemon=True, name="Log_Flusher"
+            )
+            cls._flush_thread.start()
+        return handler
+
+    @classmethod
+    def _flush_loop(cls) -> None:
+        """周期性刷盘"""
+        while not cls._flush_stop.wait(cls._flush_interval):
+            cls.flush_handlers()
+
+    @classmethod
+    def flush_handlers(cls) -> None:
+        """将缓冲中的日志写入文件"""
+        for handler in list(cls._buffered_handlers):
+            handler.flush()
+
+    @classmethod
+    def stop_listeners(cls) -> None:
+        """停止后台日志线程并写出剩余日志"""
+        while cls._listeners:
+            cls._listeners.pop().stop()
+        cls.flush_handlers()
+
+    @classmethod
+    def _setup_logger(cls, service_name: str, log_level: str) -> Dict[str, logging.Logger]:
         """配置日志系统"""
         today_str = datetime.now().strftime("%Y-%m-%d")
         log_dir = os.path.join(os.getcwd(), "logs", today_str)
@@ -34,30 +204,29 @@ class LoggerManager:
         # 主日志器
         main_logger = logging.getLogger(f"{service_name}_main")
         main_logger.setLevel(level)
+        # 不向根日志器传播：第三方库调用basicConfig后也不会重复输出
+        main_logger.propagate = False
         main_logger.handlers.clear()
 
         # 控制台处理器
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(level)
-        console_formatter = logging.Formatter(
+        console_formatter = CachedTimeFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%H:%M:%S'
         )
         console_handler.setFormatter(console_formatter)
-        main_logger.addHandler(console_handler)
 
         # 文件处理器
         log_file = os.path.join(log_dir, f"{service_name}.log")
-        file_handler = RotatingFileHandler(
-            log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
-        )
+        file_handler = cls._file_handler(log_file)
         file_handler.setLevel(level)
-        file_formatter = logging.Formatter(
+        file_formatter = CachedTimeFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        main_logger.addHandler(file_handler)
+        cls._attach_queue(main_logger, [console_handler, file_handler])
 
         loggers['main'] = main_logger
 
@@ -65,13 +234,12 @@ class LoggerManager:
         access_logger = logging.getLogger(f"{service_name}_access")
         access_logger.setLevel(logging.INFO)
         access_logger.propagate = False
+        access_logger.handlers.clear()
 
         access_file = os.path.join(log_dir, f"{service_name}_access.log")
-        access_handler = RotatingFileHandler(
-            access_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
-        )
+        access_handler = cls._file_handler(access_file)
         access_handler.setFormatter(file_formatter)
-        access_logger.addHandler(access_handler)
+        cls._attach_queue(access_logger, [access_handler])
 
         loggers['access'] = access_logger
 
@@ -79,31 +247,29 @@ class LoggerManager:
         error_logger = logging.getLogger(f"{service_name}_error")
         error_logger.setLevel(logging.ERROR)
         error_logger.propagate = False
+        error_logger.handlers.clear()
 
         error_file = os.path.join(log_dir, f"{service_name}_error.log")
-        error_handler = RotatingFileHandler(
-            error_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
-        )
-        error_formatter = logging.Formatter(
+        error_handler = cls._file_handler(error_file)
+        error_formatter = CachedTimeFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         error_handler.setFormatter(error_formatter)
-        error_logger.addHandler(error_handler)
+        cls._attach_queue(error_logger, [error_handler])
 
         loggers['error'] = error_logger
 
-        # 抑制第三方库日志
-        for lib in ["asr_model", "fish_speech", "torch", "werkzeug", "modelscope", "urllib3"]:
+        # 抑制第三方库日志（子日志器未单独设置级别时继承该级别）
+        for lib in NOISY_LOGGERS:
             logging.getLogger(lib).setLevel(logging.WARNING)
 
-        # 配置werkzeug日志
-        werkzeug_logger = logging.getLogger('werkzeug')
-        werkzeug_logger.setLevel(logging.WARNING)
-
         return loggers
 
 
+atexit.register(LoggerManager.stop_listeners)
+
+
 def get_logger(service_name: str = "default", logger_type: str = "main") -> logging.Logger:
     """获取指定类型的日志器"""
     loggers = LoggerManager.get_logger(service_name)
@@ -0,0 +1,78 @@
+import collections
+import threading
+from typing import Any, Optional, Tuple
+
+
+class BroadcastRingBuffer:
+    """单写多读的有界广播环形缓冲区
+
+    写入端永不阻塞，缓冲区满时丢弃最旧的数据；
+    每个订阅者维护自己的读游标，读得慢的订阅者只会丢失旧事件。
+    """
+
+    def __init__(self, maxsize: int = 100):
+        self._items = collections.deque(maxlen=maxsize)
+        self._head = 0  # 下一条数据的序号
+        self._subscribers = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def _oldest(self) -> int:
+        """缓冲区中最旧数据的序号"""
+        return self._head - len(self._items)
+
+    def put(self, item: Any) -> None:
+        """写入数据并唤醒等待中的订阅者"""
+        with self._cond:
+            self._items.append(item)
+            self._head += 1
+            self._cond.notify_all()
+
+    def subscribe(self) -> int:
+        """注册订阅者，返回从最旧未读数据开始的游标"""
+        with self._cond:
+            self._subscribers += 1
+            return self._oldest()
+
+    def unsubscribe(self) -> int:
+        """注销订阅者，返回剩余订阅者数量"""
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+            return self._subscribers
+
+    def wait_next(self, cursor: int, timeout: Optional[float] = None) -> Tuple[Optional[Any], int, int]:
+        """等待游标之后的下一条数据
+
+        返回 (数据, 新游标, 丢弃数量)，超时时数据为None。
+        """
+        with self._cond:
+            if cursor >= self._head:
+                self._cond.wait(timeout)
+
+            oldest = self._oldest()
+            dropped = 0
+            if cursor < oldest:
+                dropped = oldest - cursor
+                cursor = oldest
+
+            if cursor >= self._head:
+                return None, cursor, dropped
+
+            return self._items[cursor - oldest], cursor + 1, dropped
+
+    def clear(self) -> None:
+        """清空缓冲区"""
+        with self._cond:
+            self._items.clear()
+
+    def qsize(self) -> int:
+        """当前缓冲的数据量"""
+        return len(self._items)
+
+    def empty(self) -> bool:
+        """缓冲区是否为空"""
+        return not self._items
+
+    @property
+    def subscribers(self) -> int:
+        """当前订阅者数量"""
+        return self._subscribers
@@ -1,7 +1,12 @@
-import json
-import queue
 import time
 
+from utils.json_codec import JSONCodec
+from utils.ringbuf import BroadcastRingBuffer
+
+# SSE帧字节模板
+SSE_PREFIX = b"data: "
+SSE_SEPARATOR = b"\n\n"
+SSE_HEARTBEAT = b": heartbeat\n\n"
 
 
 class SSEHelper:
@@ -9,50 +14,72 @@ class SSEHelper:
 
     @staticmethod
     def send_sse_data(
-            sse_queue: queue.Queue,
+            sse_queue: BroadcastRingBuffer,
             data_type: str,
             text: str,
             maxsize: int = 100,
             **kwargs
     ) -> None:
-        """发送SSE数据"""
+        """发送SSE数据（缓冲区满时丢弃最旧事件，不阻塞写入端）"""
         sse_data = {
             'type': data_type,
             'text': text,
             'timestamp': time.time(),
             **kwargs
         }
-        try:
-            sse_queue.put_nowait(json.dumps(sse_data))
-        except queue.Full:
-            try:
-                sse_queue.get_nowait()
-                sse_queue.put_nowait(json.dumps(sse_data))
-            except queue.Empty:
-                pass
+        # 写入前一次性序列化为字节，各订阅者直接复用
+        sse_queue.put(JSONCodec.dumps_bytes(sse_data))
 
     @staticmethod
-    def clear_sse_queue(sse_queue: queue.Queue, logger) -> None:
+    def clear_sse_queue(sse_queue: BroadcastRingBuffer, logger) -> None:
         """清空SSE队列"""
         try:
-            while not sse_queue.empty():
-                sse_queue.get_nowait()
+            sse_queue.clear()
             logger.debug("SSE队列已清空")
         except Exception as e:
-            logger.warning(f"清空SSE队列失败: {str(e)}")
+            logger.warning("清空SSE队列失败: %s", e)
 
     @staticmethod
     def generate_sse_events(asr_instance, logger):
-        """生成SSE事件流"""
+        """生成SSE事件流（在合并窗口内批量输出多条事件）"""
+        sse_queue = asr_instance.sse_queue
+        cursor = sse_queue.subscribe()
+        last_write = time.monotonic()
         try:
             while not asr_instance.stop_event.is_set():
-                try:
-                    msg = asr_instance.sse_queue.get(timeout=1.0)
-                    yield f"data: {msg}\n\n"
-                except queue.Empty:
-                    yield ": heartbeat\n\n"
+                # 每轮重新读取配置，热更新的sse_*参数对已建立的连接同样生效
+                config = asr_instance.config
+                msg, cursor, dropped = sse_queue.wait_next(cursor, timeout=1.0)
+                if dropped:
+                    logger.debug("SSE客户端消费过慢，丢弃 %d 条事件", dropped)
+                if msg is None:
+                    # 空闲时定期发送心跳保持连接
+                    if time.monotonic() - last_write >= config.sse_heartbeat_seconds:
+                        last_write = time.monotonic()
+                        yield SSE_HEARTBEAT
+                    continue
+
+                # 合并窗口内继续收集事件，一次写出
+                frames = [SSE_PREFIX, msg, SSE_SEPARATOR]
+                deadline = time.monotonic() + config.sse_coalesce_ms / 1000
+                count = 1
+                while count < config.sse_coalesce_max:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    msg, cursor, _ = sse_queue.wait_next(cursor, timeout=remaining)
+                    if msg is None:
+                        break
+                    frames += (SSE_PREFIX, msg, SSE_SEPARATOR)
+                    count += 1
+
+                last_write = time.monotonic()
+                yield b"".join(frames)
         except GeneratorExit:
-            logger.info("客户端断开SSE连接")
-            SSEHelper.clear_sse_queue(asr_instance.sse_queue, logger)
+            logger.debug("客户端断开SSE连接")
         except Exception as e:
-            logger.error(f"SSE流错误: {str(e)}")
\ No newline at end of file
+            logger.error("SSE流错误: %s", e)
+        finally:
+            # 最后一个订阅者断开时清空积压事件
+            if sse_queue.unsubscribe() == 0:
+                SSEHelper.clear_sse_queue(sse_queue, logger)
@@ -0,0 +1,30 @@
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class StatCache:
+    """带过期时间的文件stat缓存"""
+
+    _cache: Dict[str, Tuple[float, os.stat_result]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def stat(cls, path: str, ttl: float = 0.2) -> os.stat_result:
+        """获取文件stat，ttl内复用缓存结果；文件不存在时抛出FileNotFoundError"""
+        now = time.monotonic()
+        cached = cls._cache.get(path)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+
+        stat_result = os.stat(path)
+        with cls._lock:
+            cls._cache[path] = (now, stat_result)
+        return stat_result
+
+    @classmethod
+    def invalidate(cls, path: str) -> None:
+        """文件被重写后使缓存失效"""
+        with cls._lock:
+            cls._cache.pop(path, None)
@@ -0,0 +1,16 @@
+from tempfile import SpooledTemporaryFile
+
+from flask import Request
+
+# 上传文件内存缓冲上限，超过后才落盘（Werkzeug默认500KB）
+UPLOAD_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+# 单个请求体大小上限
+MAX_CONTENT_LENGTH = 64 * 1024 * 1024
+
+
+class SpooledRequest(Request):
+    """提高上传文件内存缓冲阈值的请求类"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        """参考音频通常大于500KB，放宽阈值避免先写临时文件再读回内存"""
+        return SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, mode="rb+")
@@ -0,0 +1,28 @@
+"""WSGI入口
+
+用于gunicorn部署，需使用gthread线程worker：
+    AIO_ARGS="--enable-asr --enable-tts --compile" \
+    gunicorn -k gthread -w 1 --threads 64 --timeout 0 -b 0.0.0.0:5000 wsgi:app
+
+不要使用gevent/eventlet worker：monkey patch会把识别线程、TTS推理线程变成协程，
+阻塞的模型推理期间所有请求和SSE流都会停顿。
+模型与音频设备只能在一个进程中加载，因此worker数量必须为1；
+每个SSE长连接占用一个线程，--threads需大于预期的并发连接数。
+"""
+import atexit
+import os
+import shlex
+
+from main import VoiceService
+from utils.cli import parse_args
+
+args = parse_args(shlex.split(os.environ.get("AIO_ARGS", "--enable-asr --enable-tts")))
+if not args.enable_asr and not args.enable_tts:
+    raise RuntimeError("必须至少启用一个服务 (--enable-asr 或 --enable-tts)")
+
+service = VoiceService(args, handle_signals=False)
+service.initialize_services()
+app = service.create_flask_app()
+service.print_startup_info()
+
+atexit.register(service.stop)